@@ -0,0 +1,781 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+from zipfile import ZipFile
+
+from yarl import URL
+
+from loadmydata.config import CONFIG
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    import msvcrt
+
+    fcntl = None
+
+LOCK_FOLDER_STR = ".locks"
+MANIFEST_FILENAME = ".manifest.json"
+CATALOG_FILENAME = ".catalog.sqlite"
+CATALOG_COLUMNS = (
+    "name",
+    "url",
+    "size",
+    "n_files",
+    "derived_size",
+    "downloaded",
+    "last_access",
+)
+DERIVED_FOLDER_STR = "_derived"
+PART_SUFFIX = ".part"
+
+
+def get_cache_home() -> Path:
+    """Return the path of the cached data directory.
+
+    The data dir is read from the `CONFIG` variable and is created if it
+    does not exists.
+    """
+    cache_home = CONFIG["cache_home"]
+    # several processes may create it at the same time
+    cache_home.mkdir(parents=True, exist_ok=True)
+    return cache_home
+
+
+def clear_data_home() -> None:
+    """Delete the content of the data cache."""
+    cache_home = CONFIG["cache_home"]
+    if cache_home.exists():
+        shutil.rmtree(cache_home)
+
+
+def get_local_data_path(name: str):
+    """Return the path to the local data folder.
+
+    Args:
+        name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+    """
+    return get_cache_home() / name
+
+
+@contextmanager
+def dataset_lock(
+    name: str, shared: bool = False, blocking: bool = True
+) -> Iterator[bool]:
+    """Hold a lock on a data set, shared by all processes.
+
+    The lock is an advisory lock on a file of the cache's lock folder. The
+    exclusive lock is held while a data folder is written or removed
+    (download, eviction); shared locks are held while it is read (see
+    `reading_dataset`). On Windows, shared locks are exclusive. In a
+    read-only cache without lock file, shared locks are not taken.
+
+    Args:
+        name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+        shared (bool): take a shared lock instead of an exclusive one.
+            Defaults to False.
+        blocking (bool): wait until the lock is available. If False and the
+            lock is held elsewhere, the context manager yields False without
+            waiting. Defaults to True.
+
+    Yields:
+        bool: True if the lock is held.
+    """
+    lock_path = get_cache_home() / LOCK_FOLDER_STR / (name + ".lock")
+    try:
+        lock_path.parent.mkdir(exist_ok=True)
+        handle = open(lock_path, "a+b")
+    except OSError:
+        if not shared:
+            raise
+        # read-only cache: a shared lock only needs to read the lock file
+        try:
+            handle = open(lock_path, "rb")
+        except OSError:
+            handle = None
+    if handle is None:
+        # the data set cannot be locked, it is read without lock
+        yield True
+        return
+    with handle:
+        is_locked = True
+        if fcntl is not None:
+            operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+            if not blocking:
+                operation |= fcntl.LOCK_NB
+            try:
+                fcntl.flock(handle.fileno(), operation)
+            except BlockingIOError:
+                is_locked = False
+        else:
+            handle.seek(0)
+            mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), mode, 1)
+                    break
+                except OSError:
+                    if not blocking:
+                        is_locked = False
+                        break
+                    # LK_LOCK gives up after 10 seconds
+                    continue
+        if not is_locked:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def reading_dataset(name: str, download: Callable[[], None]) -> Iterator[Path]:
+    """Hold a shared lock on a cached data set while it is read, so that it
+    is not evicted meanwhile (see `enforce_cache_budget`).
+
+    If the data folder is missing (e.g. evicted since the data set was
+    downloaded), it is downloaded again first.
+
+    Args:
+        name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+        download (callable): function without arguments that downloads the
+            data set if it is not in cache.
+
+    Yields:
+        Path: data folder.
+    """
+    local_cache_data = get_local_data_path(name)
+    while True:
+        if not local_cache_data.exists():
+            download()
+        with dataset_lock(name, shared=True):
+            # the data folder may be removed until the lock is held
+            if local_cache_data.exists():
+                yield local_cache_data
+                return
+
+
+def hash_file(path: Path, block_size: int = 1024**2) -> str:
+    """Return the SHA-256 hash (hexadecimal string) of a file."""
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def write_manifest(local_cache_data: Path, url: Optional[URL] = None) -> None:
+    """Record the content of a data folder in its manifest.
+
+    For each file, the manifest stores its size, modification time and
+    SHA-256 hash. It also stores the total size and a hash of the whole data
+    set.
+
+    Args:
+        local_cache_data (Path): data folder.
+        url (URL, optional): remote location of the data. Defaults to None.
+    """
+    files = dict()
+    for path in sorted(local_cache_data.rglob("*")):
+        relative_path = path.relative_to(local_cache_data)
+        if (
+            path.is_file()
+            and path.name != MANIFEST_FILENAME
+            # derived files can be evicted (see `enforce_cache_budget`)
+            and relative_path.parts[0] != DERIVED_FOLDER_STR
+        ):
+            stat = path.stat()
+            files[relative_path.as_posix()] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": hash_file(path),
+            }
+    dataset_hash = hashlib.sha256()
+    for filename, file_info in files.items():
+        dataset_hash.update(f"{filename}:{file_info['sha256']}\n".encode())
+    manifest = {
+        "url": None if url is None else str(url),
+        "size": sum(file_info["size"] for file_info in files.values()),
+        "sha256": dataset_hash.hexdigest(),
+        "files": files,
+    }
+    save_manifest(local_cache_data, manifest)
+
+
+def save_manifest(local_cache_data: Path, manifest: dict) -> None:
+    """Atomically write the manifest of a data folder."""
+    manifest_path = local_cache_data / MANIFEST_FILENAME
+    tmp_manifest_path = manifest_path.with_name(
+        manifest_path.name + PART_SUFFIX + f".{os.getpid()}"
+    )
+    with open(tmp_manifest_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    tmp_manifest_path.replace(manifest_path)
+
+
+def load_manifest(local_cache_data: Path) -> Optional[dict]:
+    """Return the manifest of a data folder, or None if there is none."""
+    manifest_path = local_cache_data / MANIFEST_FILENAME
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def verify_data_folder(local_cache_data: Path) -> List[str]:
+    """Check that a data folder matches its manifest.
+
+    Files whose size and modification time did not change are considered
+    intact. Files with a new modification time (but the same size) are
+    hashed again; if the hash matches, the manifest is updated so that the
+    next verification is fast again.
+
+    Args:
+        local_cache_data (Path): data folder.
+
+    Returns:
+        list of str: problems found, empty if the data folder is intact.
+    """
+    manifest = load_manifest(local_cache_data)
+    if manifest is None:
+        return [f"No manifest in '{local_cache_data}'."]
+    problems = list()
+    is_manifest_updated = False
+    for filename, file_info in manifest["files"].items():
+        path = local_cache_data / filename
+        if not path.is_file():
+            problems.append(f"Missing file: '{filename}'.")
+            continue
+        stat = path.stat()
+        if stat.st_size != file_info["size"]:
+            problems.append(
+                f"Wrong size for '{filename}': {stat.st_size} bytes "
+                f"(expected {file_info['size']})."
+            )
+        elif stat.st_mtime_ns != file_info["mtime_ns"]:
+            if hash_file(path) == file_info["sha256"]:
+                file_info["mtime_ns"] = stat.st_mtime_ns
+                is_manifest_updated = True
+            else:
+                problems.append(f"Wrong hash for '{filename}'.")
+    if is_manifest_updated:
+        save_manifest(local_cache_data, manifest)
+    return problems
+
+
+def scan_data_folder(name: str) -> dict:
+    """Return the catalog record of a data folder (see `open_catalog`).
+
+    The sizes are read from the manifest of the data folder; only its
+    derived files (and the data files if there is no manifest) are walked.
+
+    Args:
+        name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+    """
+    local_cache_data = get_local_data_path(name)
+    manifest = load_manifest(local_cache_data)
+    if manifest is None:
+        files = [
+            path
+            for path in local_cache_data.rglob("*")
+            if path.is_file()
+            and path.relative_to(local_cache_data).parts[0]
+            != DERIVED_FOLDER_STR
+        ]
+        url = None
+        size = sum(path.stat().st_size for path in files)
+        n_files = len(files)
+    else:
+        url = manifest["url"]
+        size = manifest["size"]
+        n_files = len(manifest["files"])
+    mtime = local_cache_data.stat().st_mtime
+    return {
+        "name": name,
+        "url": url,
+        "size": size,
+        "n_files": n_files,
+        "derived_size": get_folder_size(local_cache_data / DERIVED_FOLDER_STR),
+        "downloaded": mtime,
+        "last_access": mtime,
+    }
+
+
+def save_catalog_record(connection: sqlite3.Connection, record: dict) -> None:
+    """Insert or replace the record of a data set in the catalog."""
+    connection.execute(
+        "INSERT OR REPLACE INTO datasets VALUES ("
+        + ", ".join(f":{column}" for column in CATALOG_COLUMNS)
+        + ")",
+        record,
+    )
+
+
+@contextmanager
+def open_catalog() -> Iterator[sqlite3.Connection]:
+    """Open the catalog of the cached data sets.
+
+    The catalog is a SQLite data base in the cache home, with one row per
+    data set (see `CATALOG_COLUMNS`), so that the cache can be listed without
+    walking the data folders. It is updated by the loaders (download, use,
+    derived files) and by `enforce_cache_budget`; these updates are skipped
+    if the catalog cannot be written (e.g. locked or read-only), and the
+    catalog is completed when it is read (see `sync_catalog`).
+
+    The statements executed in the `with` block form a single transaction.
+    """
+    catalog_path = get_cache_home() / CATALOG_FILENAME
+    connection = sqlite3.connect(str(catalog_path), timeout=60)
+    connection.row_factory = sqlite3.Row
+    try:
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS datasets ("
+                "name TEXT PRIMARY KEY, url TEXT, size INTEGER, "
+                "n_files INTEGER, derived_size INTEGER, downloaded REAL, "
+                "last_access REAL)"
+            )
+            yield connection
+    finally:
+        connection.close()
+
+
+def scan_cache_home() -> List[str]:
+    """Return the names of the data folders of the cache home."""
+    return sorted(
+        path.name
+        for path in get_cache_home().iterdir()
+        if path.is_dir()
+        and not path.name.startswith(".")
+        and not path.name.endswith(PART_SUFFIX)
+    )
+
+
+def sync_catalog(connection: sqlite3.Connection) -> None:
+    """Add the data folders that are missing from the catalog (e.g. cache
+    created by an older version, or skipped update) and remove the records
+    of the data folders that no longer exist.
+
+    Only the cache home is listed: the data folders already in the catalog
+    are not walked.
+    """
+    names = set(scan_cache_home())
+    known_names = {
+        row["name"] for row in connection.execute("SELECT name FROM datasets")
+    }
+    for name in sorted(names - known_names):
+        try:
+            save_catalog_record(connection, scan_data_folder(name))
+        except OSError:
+            # removed meanwhile
+            pass
+    connection.executemany(
+        "DELETE FROM datasets WHERE name = ?",
+        [(name,) for name in known_names - names],
+    )
+
+
+def rebuild_catalog() -> None:
+    """Build the catalog again from the data folders (e.g. after files were
+    modified by hand in a data folder). The last access times are kept."""
+    with open_catalog() as connection:
+        last_access = dict(
+            connection.execute("SELECT name, last_access FROM datasets")
+        )
+        connection.execute("DELETE FROM datasets")
+        for name in scan_cache_home():
+            record = scan_data_folder(name)
+            if name in last_access:
+                record["last_access"] = last_access[name]
+            save_catalog_record(connection, record)
+
+
+def record_download(name: str) -> None:
+    """Add a data set that was just downloaded to the catalog.
+
+    Args:
+        name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+    """
+    record = scan_data_folder(name)
+    record["downloaded"] = record["last_access"] = time.time()
+    try:
+        with open_catalog() as connection:
+            save_catalog_record(connection, record)
+    except sqlite3.Error:
+        # e.g. locked catalog, the data set is added by `sync_catalog`
+        pass
+
+
+def record_derived_files(name: str) -> None:
+    """Update the size of the derived files of a data set in the catalog.
+
+    Args:
+        name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+    """
+    derived_size = get_folder_size(
+        get_local_data_path(name) / DERIVED_FOLDER_STR
+    )
+    try:
+        with open_catalog() as connection:
+            connection.execute(
+                "UPDATE datasets SET derived_size = ? WHERE name = ?",
+                (derived_size, name),
+            )
+    except sqlite3.Error:
+        # e.g. locked or read-only catalog
+        pass
+
+
+def mark_access(name: str) -> None:
+    """Record that a cached data set has been used (its last access time is
+    used by `enforce_cache_budget`)."""
+    try:
+        with open_catalog() as connection:
+            connection.execute(
+                "UPDATE datasets SET last_access = ? WHERE name = ?",
+                (time.time(), name),
+            )
+    except sqlite3.Error:
+        # e.g. locked or read-only catalog
+        pass
+
+
+def list_cached_datasets() -> List[str]:
+    """Return the names of the data sets in cache."""
+    return sorted(get_cache_usage())
+
+
+def verify_cache(max_workers: int = 8) -> Dict[str, List[str]]:
+    """Check all cached data sets against their manifest, in parallel.
+
+    Args:
+        max_workers (int): maximum number of data sets checked
+            simultaneously. Defaults to 8.
+
+    Returns:
+        dict: {data set's name: problems found (empty list if the data set
+            is intact)}.
+    """
+    names = list_cached_datasets()
+    with ThreadPoolExecutor(max_workers) as executor:
+        problems = executor.map(
+            verify_data_folder, map(get_local_data_path, names)
+        )
+        return dict(zip(names, problems))
+
+
+def get_folder_size(path: Path) -> int:
+    """Return the total size of the files of a folder (0 if it does not
+    exist)."""
+    return sum(
+        file_path.stat().st_size
+        for file_path in path.rglob("*")
+        if file_path.is_file()
+    )
+
+
+def get_cache_usage() -> Dict[str, dict]:
+    """Return the disk usage of the cached data sets, read from the catalog
+    (see `open_catalog`). If the catalog cannot be used (e.g. locked or
+    read-only), the data folders are walked instead.
+
+    Returns:
+        dict: {data set's name: {"url": remote location,
+            "size": size of the data files in bytes,
+            "n_files": number of data files,
+            "derived_size": size of the derived files in bytes,
+            "downloaded": time stamp of the download,
+            "last_access": time stamp of the last use}}.
+    """
+    try:
+        with open_catalog() as connection:
+            sync_catalog(connection)
+            return {
+                row["name"]: {
+                    column: row[column] for column in CATALOG_COLUMNS[1:]
+                }
+                for row in connection.execute("SELECT * FROM datasets")
+            }
+    except sqlite3.Error:
+        usage = dict()
+        for name in scan_cache_home():
+            record = scan_data_folder(name)
+            del record["name"]
+            usage[name] = record
+        return usage
+
+
+def enforce_cache_budget(
+    max_bytes: Optional[int] = None,
+    eviction: Optional[str] = None,
+    keep: Iterable[str] = (),
+) -> List[str]:
+    """Evict the least recently used data sets until the cache fits in a
+    disk budget.
+
+    Data sets that are being read or written (see `dataset_lock`) are
+    skipped, as well as data sets used since their last access time was
+    read.
+
+    Args:
+        max_bytes (int, optional): budget in bytes. Defaults to None
+            (`CONFIG["cache_max_bytes"]`; if it is also None, nothing is
+            evicted).
+        eviction (str, optional): "datasets" (remove whole data folders) or
+            "derived" (only remove derived files, e.g. parsed arrays, which
+            are rebuilt without downloading). Defaults to None
+            (`CONFIG["cache_eviction"]`).
+        keep (iterable of str): names of data sets that are not evicted.
+            Defaults to ().
+
+    Returns:
+        list of str: names of the evicted data sets (or derived folders,
+            e.g. `ArrowHead/_derived`).
+    """
+    if max_bytes is None:
+        max_bytes = CONFIG["cache_max_bytes"]
+    if max_bytes is None:
+        return list()
+    if eviction is None:
+        eviction = CONFIG["cache_eviction"]
+    assert eviction in (
+        "datasets",
+        "derived",
+    ), f"Unknown eviction policy: '{eviction}'."
+
+    usage = get_cache_usage()
+    total_size = sum(
+        item["size"] + item["derived_size"] for item in usage.values()
+    )
+    keep = set(keep)
+    evicted = list()
+    for name in sorted(usage, key=lambda name: usage[name]["last_access"]):
+        if total_size <= max_bytes:
+            break
+        if name in keep:
+            continue
+        local_cache_data = get_local_data_path(name)
+        with dataset_lock(name, blocking=False) as is_locked:
+            if not is_locked:
+                # being read or written
+                continue
+            # the usage may have changed since it was read
+            try:
+                with open_catalog() as connection:
+                    record = connection.execute(
+                        "SELECT * FROM datasets WHERE name = ?", (name,)
+                    ).fetchone()
+            except sqlite3.Error:
+                # e.g. locked or read-only catalog
+                record = usage[name]
+            if record is None:
+                # evicted by another process
+                total_size -= usage[name]["size"] + usage[name]["derived_size"]
+                continue
+            if record["last_access"] > usage[name]["last_access"]:
+                # used since: no longer among the least recently used
+                continue
+            if eviction == "derived":
+                if record["derived_size"] == 0:
+                    continue
+                shutil.rmtree(
+                    local_cache_data / DERIVED_FOLDER_STR, ignore_errors=True
+                )
+                total_size -= record["derived_size"]
+                evicted.append(f"{name}/{DERIVED_FOLDER_STR}")
+                statement = "UPDATE datasets SET derived_size = 0"
+            else:
+                shutil.rmtree(local_cache_data, ignore_errors=True)
+                total_size -= record["size"] + record["derived_size"]
+                evicted.append(name)
+                statement = "DELETE FROM datasets"
+            try:
+                with open_catalog() as connection:
+                    connection.execute(statement + " WHERE name = ?", (name,))
+            except sqlite3.Error:
+                # removed data folders are dropped by `sync_catalog`
+                pass
+    return evicted
+
+
+# open archives, see `get_zip_file`
+ZIP_FILES = OrderedDict()
+ZIP_FILES_LOCK = threading.Lock()
+MAX_OPEN_ZIP_FILES = 16
+
+
+def get_zip_file(
+    archive_path: Path, mtime_ns: int, size: int
+) -> (ZipFile, Dict[str, str]):
+    """Return an open archive and the names of its members.
+
+    The names are relative to the archive's root, or to its single top-level
+    directory if there is one (as after `flatten_single_directory`).
+    Archives are kept open and identified by their modification time and size
+    to avoid reading the central directory at each access; the least
+    recently used ones are closed beyond `MAX_OPEN_ZIP_FILES`. Each process
+    opens its own archives: a forked process would otherwise share the file
+    offset of its parent's.
+
+    Args:
+        archive_path (Path): path to the .zip archive.
+        mtime_ns (int): modification time of the archive (in nanoseconds).
+        size (int): size of the archive (in bytes).
+
+    Returns:
+        (ZipFile, dict): the archive and {relative name: member name}.
+    """
+    pid = os.getpid()
+    key = (pid, archive_path, mtime_ns, size)
+    with ZIP_FILES_LOCK:
+        if key in ZIP_FILES:
+            ZIP_FILES.move_to_end(key)
+            return ZIP_FILES[key]
+
+    zf = ZipFile(archive_path, "r")
+    member_names = [name for name in zf.namelist() if not name.endswith("/")]
+    top_level_names = {name.split("/", 1)[0] for name in member_names}
+    prefix = ""
+    if len(top_level_names) == 1 and all("/" in n for n in member_names):
+        prefix = top_level_names.pop() + "/"
+    zip_file = zf, {name[len(prefix) :]: name for name in member_names}
+
+    with ZIP_FILES_LOCK:
+        if key in ZIP_FILES:
+            # opened by another thread meanwhile
+            zf.close()
+            return ZIP_FILES[key]
+        ZIP_FILES[key] = zip_file
+        # archives inherited from the parent process
+        for other_key in [
+            other_key for other_key in ZIP_FILES if other_key[0] != pid
+        ]:
+            ZIP_FILES.pop(other_key)[0].close()
+        while len(ZIP_FILES) > MAX_OPEN_ZIP_FILES:
+            # members being read keep the file open until they are closed
+            ZIP_FILES.popitem(last=False)[1][0].close()
+    return zip_file
+
+
+def find_data_file(local_cache_data: Path, filename: str):
+    """Locate a file of a cached data set.
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, relative to the data folder.
+
+    Returns:
+        Path or (ZipFile, str): the path to the file if it has been
+            extracted, otherwise the archive that contains it and the
+            member's name. None if the file cannot be found.
+    """
+    path = local_cache_data / filename
+    if path.exists():
+        return path
+    if local_cache_data.exists():
+        for archive_path in sorted(local_cache_data.glob("*.zip")):
+            stat = archive_path.stat()
+            zf, member_names = get_zip_file(
+                archive_path, stat.st_mtime_ns, stat.st_size
+            )
+            if filename in member_names:
+                return zf, member_names[filename]
+    return None
+
+
+def data_file_exists(local_cache_data: Path, filename: str) -> bool:
+    """Check if a file of a cached data set exists (possibly in an archive).
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, relative to the data folder.
+
+    Returns:
+        bool: True if the file exists, False otherwise.
+    """
+    return find_data_file(local_cache_data, filename) is not None
+
+
+def open_data_file(local_cache_data: Path, filename: str) -> BinaryIO:
+    """Open a file of a cached data set in binary mode.
+
+    The file is read from the data folder or, if the archive has been kept
+    (see `CONFIG["keep_archives"]`), directly from the .zip archive.
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, relative to the data folder.
+
+    Returns:
+        BinaryIO: file object.
+    """
+    location = find_data_file(local_cache_data, filename)
+    if location is None:
+        raise FileNotFoundError(
+            f"No file '{filename}' in data folder '{local_cache_data}'."
+        )
+    if isinstance(location, Path):
+        return open(location, "rb")
+    zf, member_name = location
+    return zf.open(member_name, "r")
+
+
+def get_data_file_signature(local_cache_data: Path, filename: str) -> list:
+    """Return the size and modification time of a file of a cached data set.
+
+    They are used to detect that a file derived from this one (e.g. parsed
+    arrays) is outdated.
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, relative to the data folder.
+
+    Returns:
+        list: [size, modification time], as JSON-serializable values.
+    """
+    location = find_data_file(local_cache_data, filename)
+    if location is None:
+        raise FileNotFoundError(
+            f"No file '{filename}' in data folder '{local_cache_data}'."
+        )
+    if isinstance(location, Path):
+        stat = location.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+    zf, member_name = location
+    member_info = zf.getinfo(member_name)
+    return [member_info.file_size, list(member_info.date_time)]
+
+
+def get_derived_data_path(local_cache_data: Path) -> Path:
+    """Return the folder of the files derived from a data set (e.g. parsed
+    arrays), inside the data folder.
+
+    The folder is not created here: the derived files are optional and the
+    data folder may be read-only.
+
+    Args:
+        local_cache_data (Path): data folder.
+    """
+    return local_cache_data / DERIVED_FOLDER_STR
@@ -1,9 +1,30 @@
+import os
 from pathlib import Path
 
 from yarl import URL
 
 LOADMYDATA_FOLDER_STR = ".loadmydata_datasets"
 CACHE_HOME = Path.home() / LOADMYDATA_FOLDER_STR
+MIRRORS_ENV_VARIABLE = "LOADMYDATA_MIRRORS"
+
+
+def get_mirrors_from_env() -> list:
+    """Return the mirrors listed in the `LOADMYDATA_MIRRORS` environment
+    variable.
+
+    Mirrors are separated by commas and are either URLs (`http://`,
+    `file://`, etc.) or local paths.
+    """
+    mirrors = list()
+    for mirror in os.environ.get(MIRRORS_ENV_VARIABLE, "").split(","):
+        mirror = mirror.strip()
+        if mirror == "":
+            continue
+        if "://" not in mirror:
+            mirror = Path(mirror).expanduser().absolute().as_uri()
+        mirrors.append(URL(mirror))
+    return mirrors
+
 
 CONFIG = {
     "cache_home": CACHE_HOME,
@@ -17,8 +38,40 @@ CONFIG = {
     "molene_meteo_download_link": URL(
         "https://www.data.gouv.fr/fr/datasets/r/6e493a9b-0ef5-4a69-8a56-a7bfb4e35d14"
     ),
+    "molene_meteo_readme_download_link": URL(
+        "https://www.data.gouv.fr/fr/datasets/r/80fb22dc-e155-4d5d-a02e-d263fa789fda"
+    ),
+    # mirrors, tried in order before the original locations
+    "mirrors": get_mirrors_from_env(),
+    # (connect, read) timeouts of HTTP requests in seconds: a stalled
+    # download fails (and can be resumed) instead of hanging
+    "download_timeout": (10, 60),
+    # parallel downloads (for servers that accept byte ranges)
+    "download_n_connections": 4,
+    "download_chunk_size": 8 * 1024**2,  # 8 Mebibytes
+    # uncompress archives while they are downloaded
+    "streaming_extraction": False,
+    # keep .zip archives in cache instead of uncompressing them
+    "keep_archives": False,
+    # store parsed arrays as .npy files in the data folder
+    "cache_parsed_data": True,
+    # maximum size of the cache folder in bytes (None for no limit); the
+    # least recently used data sets are evicted ("datasets"), or only their
+    # derived files, e.g. parsed arrays ("derived")
+    "cache_max_bytes": None,
+    "cache_eviction": "datasets",
+    # keep loaded data sets in memory (least recently used first out), up to
+    # this number of bytes; 0 to disable
+    "memory_cache_size": 0,
 }
 
+# The download links can be overridden with environment variables, e.g.
+# LOADMYDATA_UEA_UCR_DOWNLOAD_LINK.
+for key in list(CONFIG):
+    env_variable = f"LOADMYDATA_{key.upper()}"
+    if key.endswith("_download_link") and env_variable in os.environ:
+        CONFIG[key] = URL(os.environ[env_variable])
+
 # for the human locomotion data set
 HUMAN_LOCOMOTION_CODE_LIST = [
     "1-1",
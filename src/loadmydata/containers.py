@@ -0,0 +1,248 @@
+import inspect
+import threading
+from collections import OrderedDict
+from collections.abc import ItemsView, KeysView, ValuesView
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.utils import Bunch
+
+from loadmydata.cache import get_cache_home
+from loadmydata.config import CONFIG
+from loadmydata.padding import RaggedArray
+
+
+class LazyBunch(Bunch):
+    """Bunch whose values can be computed on first access.
+
+    Pending values are given as functions without arguments. Each function
+    is called once, the first time its key is accessed (by key, attribute or
+    `get`), and the result replaces it. Pending keys behave like the other
+    keys (`in`, `len`, `keys`, iteration); reading the values (`values`,
+    `items`, `dict(bunch)`, `**bunch`) computes them. A pickled LazyBunch is
+    a plain Bunch with all values computed.
+    """
+
+    def __init__(
+        self, loaders: Optional[Dict[str, Callable]] = None, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.__dict__["_loaders"] = dict(loaders or {})
+
+    def __missing__(self, key):
+        loaders = self.__dict__.get("_loaders", {})
+        if key not in loaders:
+            raise KeyError(key)
+        value = loaders[key]()
+        # the loader is removed only once it succeeded
+        self[key] = value
+        del loaders[key]
+        return value
+
+    def __contains__(self, key) -> bool:
+        return super().__contains__(key) or key in self.__dict__.get(
+            "_loaders", {}
+        )
+
+    def __iter__(self) -> Iterator:
+        # snapshot: computing a value moves its key from the loaders
+        return iter(list(super().keys()) + self.pending_keys)
+
+    def __len__(self) -> int:
+        return super().__len__() + len(self.__dict__.get("_loaders", {}))
+
+    def keys(self) -> KeysView:
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        return ItemsView(self)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __dir__(self):
+        return list(self.keys())
+
+    def __reduce_ex__(self, protocol):
+        return Bunch, (), None, None, iter(self.materialize().items())
+
+    @property
+    def pending_keys(self) -> List[str]:
+        """Keys whose values have not been computed yet."""
+        return list(self.__dict__.get("_loaders", {}))
+
+    def materialize(self) -> "LazyBunch":
+        """Compute all pending values and return the bunch."""
+        for key in self.pending_keys:
+            self[key]
+        return self
+
+
+def get_nbytes(value) -> int:
+    """Return the memory used by the arrays and data frames of a (possibly
+    nested) loaded data set."""
+    if isinstance(value, np.ndarray):
+        nbytes = value.nbytes
+        if isinstance(value, np.ma.MaskedArray):
+            nbytes += np.ma.getmaskarray(value).nbytes
+        return nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, dict):
+        return sum(get_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(get_nbytes(item) for item in value)
+    if isinstance(value, str):
+        return len(value)
+    return getattr(value, "nbytes", 0)
+
+
+def set_read_only(value):
+    """Make the arrays of a (possibly nested) loaded data set read-only, and
+    return it."""
+    if isinstance(value, np.ma.MaskedArray):
+        value.flags.writeable = False
+        mask = np.ma.getmask(value)  # not a view, unlike value.mask
+        if mask is not np.ma.nomask:
+            mask.flags.writeable = False
+    elif isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for item in value.values():
+            set_read_only(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            set_read_only(item)
+    elif isinstance(value, RaggedArray):
+        value.values.flags.writeable = False
+        value.offsets.flags.writeable = False
+    return value
+
+
+def is_copy_on_write() -> bool:
+    """Return True if pandas copies the data of a shallow copy before it is
+    modified (always the case from pandas 3.0)."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except KeyError:
+        # pandas < 1.5
+        return False
+
+
+def copy_containers(value):
+    """Return a shallow copy of the containers (Bunch, dict, list, tuple) and
+    data frames of a (possibly nested) loaded data set, so that they can be
+    modified without altering the cached data set. The arrays are not
+    copied.
+
+    Without Copy-on-Write (pandas < 3.0), a shallow copy of a data frame
+    shares its data with the cached data frame, so data frames and series
+    are copied entirely.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=not is_copy_on_write())
+    if isinstance(value, dict):
+        return type(value)(
+            **{key: copy_containers(item) for key, item in value.items()}
+        )
+    if isinstance(value, (list, tuple)):
+        return type(value)(copy_containers(item) for item in value)
+    return value
+
+
+class MemoryCache:
+    """Loaded data sets, kept in memory up to a number of bytes.
+
+    When the budget is exceeded, the least recently used data sets are
+    evicted. Data sets larger than the budget are not kept.
+    """
+
+    def __init__(self) -> None:
+        self.items = OrderedDict()  # key: (value, nbytes)
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return a data set (and mark it as recently used)."""
+        with self.lock:
+            if key not in self.items:
+                return default
+            self.items.move_to_end(key)
+            return self.items[key][0]
+
+    def put(self, key, value, max_bytes: int) -> None:
+        """Add a data set and evict the least recently used ones if
+        needed."""
+        nbytes = get_nbytes(value)
+        with self.lock:
+            if key in self.items:
+                self.nbytes -= self.items.pop(key)[1]
+            if nbytes > max_bytes:
+                return
+            self.items[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > max_bytes:
+                _, (_, evicted_nbytes) = self.items.popitem(last=False)
+                self.nbytes -= evicted_nbytes
+
+    def clear(self) -> None:
+        with self.lock:
+            self.items.clear()
+            self.nbytes = 0
+
+
+MEMORY_CACHE = MemoryCache()
+
+
+def clear_memory_cache() -> None:
+    """Remove all data sets from the in-memory cache."""
+    MEMORY_CACHE.clear()
+
+
+def memory_cached(func: Callable) -> Callable:
+    """Keep the data sets returned by a loader in memory (see
+    `CONFIG["memory_cache_size"]`).
+
+    The cache is keyed on the loader, its arguments and the cache folder.
+    Calls with unhashable arguments (e.g. arrays of indices) or with
+    `lazy=True` are not cached. The arrays of cached data sets are read-only
+    (they are shared between calls); the containers (Bunch, tuple) and data
+    frames are shallow copies.
+    """
+    signature = inspect.signature(func)
+    missing = object()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        max_bytes = CONFIG["memory_cache_size"]
+        if max_bytes <= 0:
+            return func(*args, **kwargs)
+        arguments = signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        if arguments.arguments.get("lazy", False):
+            return func(*args, **kwargs)
+        key = (
+            func.__module__,
+            func.__qualname__,
+            str(get_cache_home()),
+            tuple(arguments.arguments.items()),
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        value = MEMORY_CACHE.get(key, missing)
+        if value is missing:
+            value = set_read_only(func(*args, **kwargs))
+            MEMORY_CACHE.put(key, value, max_bytes)
+        return copy_containers(value)
+
+    return wrapper
@@ -0,0 +1,796 @@
+import json
+import os
+import shutil
+import struct
+import tarfile
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Union
+from urllib.request import url2pathname
+from zipfile import ZipFile
+
+import requests
+from tqdm import tqdm
+from yarl import URL
+
+from loadmydata.cache import (
+    PART_SUFFIX,
+    dataset_lock,
+    get_cache_home,
+    record_download,
+    write_manifest,
+)
+from loadmydata.config import CONFIG
+
+DOWNLOAD_FOLDER_STR = ".downloads"
+CHUNKS_SUFFIX = ".chunks"
+ZIP_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+ZIP_DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+# central directory header, end of central directory record (zip and zip64)
+ZIP_CENTRAL_DIRECTORY_SIGNATURES = (
+    b"PK\x01\x02",
+    b"PK\x05\x06",
+    b"PK\x06\x06",
+)
+
+
+def get_download_dir() -> Path:
+    """Return the folder where archives are stored while being downloaded.
+
+    Interrupted downloads are kept in this folder so that they can be resumed.
+    """
+    download_dir = get_cache_home() / DOWNLOAD_FOLDER_STR
+    download_dir.mkdir(exist_ok=True)
+    return download_dir
+
+
+def download_file_http(
+    url: URL, local_path: Path, block_size: int = 1024, verbose: bool = True
+) -> Path:
+    """Download a remote file over HTTP(S).
+
+    The data are written to a `.part` file which is renamed to `local_path`
+    once the download is complete. If a `.part` file already exists (from an
+    interrupted download), the download resumes where it stopped with an HTTP
+    `Range` request.
+
+    Large files are fetched with several connections at the same time when
+    the server accepts byte ranges (see `download_file_in_chunks`).
+
+    Args:
+        url (URL): remote location of the file.
+        local_path (Path): where to write the file.
+        block_size (int): size (in bytes) of the streamed blocks.
+        verbose (bool): display a progress bar. Defaults to True.
+
+    Returns:
+        Path: path to the downloaded file.
+    """
+    if local_path.exists():
+        # already downloaded (e.g. before an interrupted extraction)
+        return local_path
+
+    part_path = local_path.with_name(local_path.name + PART_SUFFIX)
+    chunks_path = part_path.with_name(part_path.name + CHUNKS_SUFFIX)
+    if chunks_path.exists() or (
+        not part_path.exists() and CONFIG["download_n_connections"] > 1
+    ):
+        total_size_in_bytes = get_remote_size_if_ranges(url)
+        if chunks_path.exists() and total_size_in_bytes is None:
+            # The server does not accept byte ranges anymore, start from
+            # scratch.
+            chunks_path.unlink()
+            if part_path.exists():
+                part_path.unlink()
+        elif total_size_in_bytes is not None and (
+            chunks_path.exists()
+            or total_size_in_bytes >= 2 * CONFIG["download_chunk_size"]
+        ):
+            download_file_in_chunks(
+                url,
+                part_path,
+                total_size_in_bytes,
+                block_size=block_size,
+                verbose=verbose,
+            )
+            part_path.replace(local_path)
+            return local_path
+
+    n_bytes_done = part_path.stat().st_size if part_path.exists() else 0
+    # the sizes and offsets are those of the file, not of a compressed
+    # transfer encoding
+    headers = {"Accept-Encoding": "identity"}
+    if n_bytes_done > 0:
+        headers["Range"] = f"bytes={n_bytes_done}-"
+
+    response = requests.get(
+        str(url),
+        stream=True,
+        headers=headers,
+        timeout=CONFIG["download_timeout"],
+    )
+    if response.status_code == 416:
+        # The requested range starts after the end of the file: the previous
+        # download was complete but was not renamed.
+        content_range = response.headers.get("content-range", "")
+        if content_range.endswith(f"/{n_bytes_done}"):
+            part_path.replace(local_path)
+            return local_path
+        # Otherwise, the partial file is unusable, start from scratch.
+        part_path.unlink()
+        return download_file_http(
+            url, local_path, block_size=block_size, verbose=verbose
+        )
+    response.raise_for_status()
+    if response.status_code != 206:
+        # The server ignored the `Range` header and sends the whole file.
+        n_bytes_done = 0
+
+    # handle the download progress bar
+    content_length = int(response.headers.get("content-length", 0))
+    total_size_in_bytes = n_bytes_done + content_length
+    progress_bar = tqdm(
+        total=total_size_in_bytes,
+        initial=n_bytes_done,
+        unit="iB",
+        unit_scale=True,
+        disable=not verbose,
+    )
+    # actual download
+    with open(part_path, "ab" if n_bytes_done > 0 else "wb") as handle:
+        for data in response.iter_content(block_size):
+            progress_bar.update(len(data))
+            handle.write(data)
+            n_bytes_done += len(data)
+    progress_bar.close()
+    if content_length != 0 and n_bytes_done != total_size_in_bytes:
+        raise OSError(
+            f"The download of {local_path.name} went wrong "
+            f"({n_bytes_done}/{total_size_in_bytes} bytes). Call the "
+            "function again to resume the download."
+        )
+    part_path.replace(local_path)
+    return local_path
+
+
+def get_remote_size_if_ranges(url: URL) -> Optional[int]:
+    """Return the size of a remote file if the server accepts byte ranges.
+
+    Args:
+        url (URL): remote location of the file.
+
+    Returns:
+        int or None: size in bytes, or None if the size is unknown or if the
+            server does not accept `Range` requests.
+    """
+    try:
+        response = requests.head(
+            str(url),
+            allow_redirects=True,
+            headers={"Accept-Encoding": "identity"},
+            timeout=CONFIG["download_timeout"],
+        )
+    except requests.RequestException:
+        return None
+    if (
+        response.status_code != 200
+        or response.headers.get("accept-ranges", "").lower() != "bytes"
+        or "content-length" not in response.headers
+    ):
+        return None
+    return int(response.headers["content-length"])
+
+
+def write_at(fd: int, data: bytes, offset: int) -> None:
+    """Write `data` at position `offset` of an open file descriptor."""
+    view = memoryview(data)
+    while len(view) > 0:
+        if hasattr(os, "pwrite"):
+            n_written = os.pwrite(fd, view, offset)
+        else:
+            # each thread uses its own file descriptor, lseek is safe.
+            os.lseek(fd, offset, os.SEEK_SET)
+            n_written = os.write(fd, view)
+        view = view[n_written:]
+        offset += n_written
+
+
+def download_file_in_chunks(
+    url: URL,
+    part_path: Path,
+    total_size_in_bytes: int,
+    block_size: int = 1024,
+    verbose: bool = True,
+) -> None:
+    """Download a remote file with several simultaneous connections.
+
+    The file is split into chunks of `CONFIG["download_chunk_size"]` bytes
+    which are fetched by `CONFIG["download_n_connections"]` threads with HTTP
+    `Range` requests and written at their position in a preallocated file.
+    The indexes of the completed chunks are stored next to the `.part` file so
+    that an interrupted download only fetches the missing chunks.
+
+    Args:
+        url (URL): remote location of the file.
+        part_path (Path): where to write the file.
+        total_size_in_bytes (int): size of the remote file.
+        block_size (int): size (in bytes) of the streamed blocks.
+        verbose (bool): display a progress bar. Defaults to True.
+    """
+    chunk_size = CONFIG["download_chunk_size"]
+    n_chunks = -(-total_size_in_bytes // chunk_size)
+    chunks_path = part_path.with_name(part_path.name + CHUNKS_SUFFIX)
+    if chunks_path.exists() and part_path.exists():
+        with open(chunks_path, "r") as f:
+            done_chunks = set(json.load(f))
+    else:
+        done_chunks = set()
+        # preallocate the file
+        with open(part_path, "wb") as handle:
+            handle.truncate(total_size_in_bytes)
+
+    def get_chunk_bounds(index: int) -> (int, int):
+        start = index * chunk_size
+        return start, min(start + chunk_size, total_size_in_bytes)
+
+    progress_bar = tqdm(
+        total=total_size_in_bytes,
+        initial=sum(
+            end - start for (start, end) in map(get_chunk_bounds, done_chunks)
+        ),
+        unit="iB",
+        unit_scale=True,
+        disable=not verbose,
+    )
+    lock = threading.Lock()
+
+    def download_chunk(index: int) -> None:
+        start, end = get_chunk_bounds(index)
+        response = requests.get(
+            str(url),
+            stream=True,
+            headers={
+                "Range": f"bytes={start}-{end - 1}",
+                "Accept-Encoding": "identity",
+            },
+            timeout=CONFIG["download_timeout"],
+        )
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise OSError(f"The server ignored the range of chunk {index}.")
+        fd = os.open(part_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+        try:
+            offset = start
+            for data in response.iter_content(block_size):
+                write_at(fd, data, offset)
+                offset += len(data)
+                with lock:
+                    progress_bar.update(len(data))
+        finally:
+            os.close(fd)
+        if offset != end:
+            raise OSError(
+                f"The download of {part_path.name} went wrong (chunk {index})."
+                " Call the function again to resume the download."
+            )
+        with lock:
+            done_chunks.add(index)
+            with open(chunks_path, "w") as f:
+                json.dump(sorted(done_chunks), f)
+
+    with open(chunks_path, "w") as f:
+        json.dump(sorted(done_chunks), f)
+    try:
+        with ThreadPoolExecutor(CONFIG["download_n_connections"]) as executor:
+            todo = sorted(set(range(n_chunks)) - done_chunks)
+            list(executor.map(download_chunk, todo))
+    finally:
+        progress_bar.close()
+    chunks_path.unlink()
+
+
+class HTTPTransport:
+    """Fetch files over HTTP(S), e.g. from the original host or a mirror."""
+
+    def download(
+        self,
+        url: URL,
+        local_path: Path,
+        block_size: int = 1024,
+        verbose: bool = True,
+    ) -> Path:
+        """Download a file (see `download_file_http`)."""
+        return download_file_http(
+            url, local_path, block_size=block_size, verbose=verbose
+        )
+
+    def open(self, url: URL) -> (BinaryIO, int):
+        """Return a file object that streams the file, and its size (0 if
+        unknown)."""
+        response = requests.get(
+            str(url), stream=True, timeout=CONFIG["download_timeout"]
+        )
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return response.raw, int(response.headers.get("content-length", 0))
+
+
+class FileTransport:
+    """Fetch files from the local file system (`file://` URLs), e.g. from a
+    mirror on a local or network disk."""
+
+    def download(
+        self,
+        url: URL,
+        local_path: Path,
+        block_size: int = 1024,
+        verbose: bool = True,
+    ) -> Path:
+        """Copy a file."""
+        part_path = local_path.with_name(local_path.name + PART_SUFFIX)
+        shutil.copyfile(url_to_path(url), part_path)
+        part_path.replace(local_path)
+        return local_path
+
+    def open(self, url: URL) -> (BinaryIO, int):
+        """Return a file object, and the file's size."""
+        path = url_to_path(url)
+        return open(path, "rb"), path.stat().st_size
+
+
+TRANSPORTS = {
+    "http": HTTPTransport(),
+    "https": HTTPTransport(),
+    "file": FileTransport(),
+}
+
+
+def url_to_path(url: URL) -> Path:
+    """Return the local path of a `file://` URL."""
+    return Path(url2pathname(url.path))
+
+
+def register_transport(scheme: str, transport) -> None:
+    """Use `transport` to fetch the URLs with the given scheme.
+
+    A transport has a `download(url, local_path, block_size, verbose)` method
+    that writes the file at `local_path`, and an `open(url)` method that
+    returns a binary file object and the size of the file.
+
+    Args:
+        scheme (str): URL scheme, e.g. `s3`.
+        transport: the transport object.
+    """
+    TRANSPORTS[scheme] = transport
+
+
+def get_transport(url: URL):
+    """Return the transport associated with the URL's scheme."""
+    try:
+        return TRANSPORTS[url.scheme]
+    except KeyError:
+        raise ValueError(f"No transport for URL '{url}'.") from None
+
+
+def get_download_urls(url: URL, source: str, filename: str) -> List[URL]:
+    """Return the locations of a file, in order of preference.
+
+    Mirrors (`CONFIG["mirrors"]`) come first, then the original location. A
+    mirror stores the files under `<mirror>/<source>/<filename>`.
+
+    Args:
+        url (URL): original location of the file.
+        source (str): name of the data source, e.g. `uea_ucr`.
+        filename (str): name of the file in the mirror, e.g. `ArrowHead.zip`.
+
+    Returns:
+        list of URL: the locations of the file.
+    """
+    mirror_urls = [
+        URL(str(mirror)) / source / filename for mirror in CONFIG["mirrors"]
+    ]
+    return mirror_urls + [url]
+
+
+def as_url_list(urls: Union[URL, str, Iterable]) -> List[URL]:
+    """Return a list of URL from one or several URLs."""
+    if isinstance(urls, (URL, str)):
+        urls = [urls]
+    return [URL(str(url)) for url in urls]
+
+
+def download_file(
+    urls: Union[URL, List[URL]],
+    local_path: Path,
+    block_size: int = 1024,
+    verbose: bool = True,
+) -> Path:
+    """Download a file from the first location that works.
+
+    Args:
+        urls (URL or list of URL): location(s) of the file, in order of
+            preference (see `get_download_urls`).
+        local_path (Path): where to write the file.
+        block_size (int): size (in bytes) of the streamed blocks.
+        verbose (bool): display a progress bar. Defaults to True.
+
+    Returns:
+        Path: path to the downloaded file.
+    """
+    if local_path.exists():
+        # already downloaded (e.g. before an interrupted extraction)
+        return local_path
+
+    errors = list()
+    for url in as_url_list(urls):
+        try:
+            return get_transport(url).download(
+                url, local_path, block_size=block_size, verbose=verbose
+            )
+        except OSError as err:
+            errors.append(err)
+    if len(errors) == 1:
+        raise errors[0]
+    raise OSError(
+        f"The download of {local_path.name} failed from all locations: "
+        + "; ".join(map(str, errors))
+    ) from errors[-1]
+
+
+def open_url(urls: Union[URL, List[URL]]) -> (BinaryIO, int):
+    """Open a file from the first location that works.
+
+    Args:
+        urls (URL or list of URL): location(s) of the file, in order of
+            preference (see `get_download_urls`).
+
+    Returns:
+        (BinaryIO, int): file object and size of the file (0 if unknown).
+    """
+    urls = as_url_list(urls)
+    for index, url in enumerate(urls):
+        try:
+            return get_transport(url).open(url)
+        except OSError:
+            if index == len(urls) - 1:
+                raise
+
+
+def flatten_single_directory(extract_dir: Path) -> None:
+    """Move up the content of a folder that only contains one sub-directory.
+
+    Args:
+        extract_dir (Path): folder of the extracted archive.
+    """
+    # Check if the extracted directory contains a single sub-directory and
+    # no other file.
+    directory_list = [x for x in extract_dir.iterdir() if x.is_dir()]
+    non_directory_list = [x for x in extract_dir.iterdir() if not x.is_dir()]
+    if len(directory_list) == 1 and len(non_directory_list) == 0:
+        sub_dir = directory_list[0]
+        for element in sub_dir.iterdir():
+            shutil.move(str(element), str(sub_dir.parent))
+        os.rmdir(str(sub_dir))
+
+
+def extract_archive(archive_path: Path, extract_dir: Path) -> None:
+    """Uncompress a .zip or .tar(.gz) archive.
+
+    If the archive contains a single directory and no other file, the content
+    of this directory is moved directly into `extract_dir`.
+
+    Args:
+        archive_path (Path): path to the archive.
+        extract_dir (Path): destination folder.
+
+    Raises:
+        OSError: the file is not a valid .zip or .tar(.gz) archive (e.g.
+            truncated file or error page).
+    """
+    try:
+        if zipfile.is_zipfile(archive_path):
+            with ZipFile(archive_path, "r") as zf:
+                zf.extractall(extract_dir)
+        elif tarfile.is_tarfile(archive_path):
+            with tarfile.open(archive_path) as tar:
+                tar.extractall(extract_dir)
+        else:
+            raise OSError(
+                f"'{archive_path.name}' is not a zip or tar archive."
+            )
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError) as err:
+        raise OSError(
+            f"'{archive_path.name}' is not a valid archive: {err}"
+        ) from err
+    flatten_single_directory(extract_dir)
+
+
+class StreamReader:
+    """Read-only file-like wrapper around a stream of bytes.
+
+    It keeps track of the progress and allows to push back bytes that were
+    read in excess.
+
+    Args:
+        fileobj: binary file-like object.
+        progress_bar (tqdm, optional): updated with the number of bytes read.
+    """
+
+    def __init__(self, fileobj, progress_bar: Optional[tqdm] = None) -> None:
+        self.fileobj = fileobj
+        self.progress_bar = progress_bar
+        self.buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self.buffer + self.fileobj.read()
+            self.buffer = b""
+        elif len(self.buffer) >= size:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        else:
+            data = self.buffer + self.fileobj.read(size - len(self.buffer))
+            self.buffer = b""
+        if self.progress_bar is not None:
+            self.progress_bar.update(len(data))
+        return data
+
+    def read_exactly(self, size: int) -> bytes:
+        chunks = list()
+        while size > 0:
+            data = self.read(size)
+            if len(data) == 0:
+                raise EOFError("The stream ended unexpectedly.")
+            chunks.append(data)
+            size -= len(data)
+        return b"".join(chunks)
+
+    def unread(self, data: bytes) -> None:
+        self.buffer = data + self.buffer
+        if self.progress_bar is not None:
+            self.progress_bar.update(-len(data))
+
+
+def get_safe_path(extract_dir: Path, member_name: str) -> Path:
+    """Return the destination of an archive member inside `extract_dir`."""
+    target = (extract_dir / member_name).resolve()
+    if extract_dir.resolve() not in target.parents:
+        raise ValueError(f"Illegal path in archive: '{member_name}'.")
+    return target
+
+
+def extract_zip_stream(
+    reader: StreamReader, extract_dir: Path, block_size: int = 1024**2
+) -> None:
+    """Uncompress a .zip archive while it is being read.
+
+    Members are decompressed from their local headers, as soon as their bytes
+    are available; the central directory (at the end of the archive) is not
+    needed.
+
+    Args:
+        reader (StreamReader): the archive's content.
+        extract_dir (Path): destination folder.
+        block_size (int): size (in bytes) of the streamed blocks.
+
+    Raises:
+        NotImplementedError: if a member cannot be decompressed without the
+            central directory (unsupported compression method, encryption,
+            stored member of unknown size).
+        EOFError: if the archive is truncated.
+        OSError: if the archive is corrupted.
+    """
+    while True:
+        # a truncated archive raises an EOFError
+        signature = reader.read_exactly(4)
+        if signature in ZIP_CENTRAL_DIRECTORY_SIGNATURES:
+            # all members are done
+            break
+        if signature != ZIP_LOCAL_HEADER_SIGNATURE:
+            raise OSError(
+                f"Unexpected signature {signature!r} in the zip archive."
+            )
+        (
+            _,
+            flags,
+            method,
+            _,
+            _,
+            crc,
+            compressed_size,
+            _,
+            name_length,
+            extra_length,
+        ) = struct.unpack("<HHHHHIIIHH", reader.read_exactly(26))
+        name = reader.read_exactly(name_length).decode(
+            "utf-8" if flags & 0x800 else "cp437"
+        )
+        extra = reader.read_exactly(extra_length)
+        has_data_descriptor = bool(flags & 0x8)
+        is_zip64 = False
+        # zip64 extra field
+        offset = 0
+        while offset + 4 <= len(extra):
+            header_id, data_size = struct.unpack_from("<HH", extra, offset)
+            if header_id == 0x0001 and compressed_size == 0xFFFFFFFF:
+                is_zip64 = True
+                _, compressed_size = struct.unpack_from(
+                    "<QQ", extra, offset + 4
+                )
+            offset += 4 + data_size
+        if flags & 0x1:
+            raise NotImplementedError(f"Member '{name}' is encrypted.")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise NotImplementedError(
+                f"Unsupported compression method ({method}) for '{name}'."
+            )
+        if method == zipfile.ZIP_STORED and has_data_descriptor:
+            raise NotImplementedError(f"Unknown size for member '{name}'.")
+
+        target = get_safe_path(extract_dir, name)
+        if name.endswith("/"):
+            target.mkdir(parents=True, exist_ok=True)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        decompressor = (
+            zlib.decompressobj(-zlib.MAX_WBITS)
+            if method == zipfile.ZIP_DEFLATED
+            else None
+        )
+        actual_crc = 0
+        with open(os.devnull if name.endswith("/") else target, "wb") as f:
+            n_bytes_left = None if has_data_descriptor else compressed_size
+            while n_bytes_left is None or n_bytes_left > 0:
+                data = reader.read(
+                    block_size
+                    if n_bytes_left is None
+                    else min(block_size, n_bytes_left)
+                )
+                if len(data) == 0:
+                    raise EOFError("The stream ended unexpectedly.")
+                if n_bytes_left is not None:
+                    n_bytes_left -= len(data)
+                if decompressor is not None:
+                    data = decompressor.decompress(data)
+                actual_crc = zlib.crc32(data, actual_crc)
+                f.write(data)
+                if decompressor is not None and decompressor.eof:
+                    reader.unread(decompressor.unused_data)
+                    break
+        if has_data_descriptor:
+            descriptor = reader.read_exactly(4)
+            if descriptor == ZIP_DATA_DESCRIPTOR_SIGNATURE:
+                descriptor = reader.read_exactly(4)
+            crc = struct.unpack("<I", descriptor)[0]
+            # skip the compressed and uncompressed sizes
+            reader.read_exactly(16 if is_zip64 else 8)
+        if actual_crc != crc:
+            raise OSError(f"Bad CRC-32 for member '{name}'.")
+
+
+def stream_and_extract_archive(
+    urls: Union[URL, List[URL]], extract_dir: Path, verbose: bool = True
+) -> None:
+    """Uncompress a remote .zip or .tar(.gz) archive while downloading it.
+
+    The archive is never written to disk: the HTTP body goes directly through
+    the decompressor into `extract_dir`. Contrary to `download_file`, an
+    interrupted download cannot be resumed.
+
+    Args:
+        urls (URL or list of URL): location(s) of the archive, in order of
+            preference.
+        extract_dir (Path): destination folder.
+        verbose (bool): display a progress bar. Defaults to True.
+
+    Raises:
+        NotImplementedError: if the archive is a .zip file that cannot be
+            uncompressed on the fly (see `extract_zip_stream`).
+    """
+    fileobj, total_size_in_bytes = open_url(urls)
+    with fileobj, tqdm(
+        total=total_size_in_bytes,
+        unit="iB",
+        unit_scale=True,
+        disable=not verbose,
+    ) as progress_bar:
+        reader = StreamReader(fileobj, progress_bar=progress_bar)
+        magic_number = reader.read(4)
+        reader.unread(magic_number)
+        if magic_number == ZIP_LOCAL_HEADER_SIGNATURE:
+            extract_zip_stream(reader, extract_dir)
+        else:
+            with tarfile.open(fileobj=reader, mode="r|*") as tar:
+                tar.extractall(extract_dir)
+    flatten_single_directory(extract_dir)
+
+
+def download_and_extract_archive(
+    urls: Union[URL, List[URL]],
+    archive_name: str,
+    local_cache_data: Path,
+    extra_files: Optional[Dict[str, URL]] = None,
+    verbose: bool = True,
+) -> None:
+    """Download an archive and uncompress it in the local cache.
+
+    The archive is extracted in a temporary folder which is renamed to
+    `local_cache_data` once everything is in place. As a result, the data
+    folder only exists if the download and the extraction were successful.
+    The whole procedure holds the data set's lock (see `dataset_lock`): other
+    processes wait for the data folder instead of downloading it again.
+
+    If `CONFIG["streaming_extraction"]` is True, the archive is uncompressed
+    while it is downloaded (see `stream_and_extract_archive`), unless a
+    previous download of the archive can be resumed.
+
+    Args:
+        urls (URL or list of URL): location(s) of the archive, in order of
+            preference (see `get_download_urls`).
+        archive_name (str): file name of the archive, e.g. `ArrowHead.zip`.
+        local_cache_data (Path): data folder.
+        extra_files (dict, optional): additional files to download in the data
+            folder, {file name: url(s)}. Defaults to None.
+        verbose (bool): display a progress bar. Defaults to True.
+    """
+    with dataset_lock(local_cache_data.name):
+        if local_cache_data.exists():
+            # downloaded by another process while waiting for the lock
+            return
+
+        local_archive_path = get_download_dir() / archive_name
+        # uncompress the data in a temporary folder, only visible to the
+        # lock holder
+        tmp_cache_data = local_cache_data.with_name(
+            local_cache_data.name + PART_SUFFIX
+        )
+        if tmp_cache_data.exists():
+            # left over by an interrupted download or extraction
+            shutil.rmtree(tmp_cache_data)
+        tmp_cache_data.mkdir(parents=True)
+
+        is_streamed = False
+        is_resumable = any(
+            path.name.startswith(archive_name)
+            for path in get_download_dir().iterdir()
+        )
+        if (
+            CONFIG["streaming_extraction"]
+            and not CONFIG["keep_archives"]
+            and not is_resumable
+        ):
+            try:
+                stream_and_extract_archive(
+                    urls, tmp_cache_data, verbose=verbose
+                )
+                is_streamed = True
+            except NotImplementedError:
+                # fall back to the download of the whole archive
+                shutil.rmtree(tmp_cache_data)
+                tmp_cache_data.mkdir()
+        if not is_streamed:
+            download_file(urls, local_archive_path, verbose=verbose)
+            if CONFIG["keep_archives"] and zipfile.is_zipfile(
+                local_archive_path
+            ):
+                # members are read directly from the archive
+                shutil.move(str(local_archive_path), str(tmp_cache_data))
+            else:
+                try:
+                    extract_archive(local_archive_path, tmp_cache_data)
+                except OSError:
+                    # an invalid archive would be reused by the next call
+                    os.remove(local_archive_path)
+                    raise
+                # remove archive file
+                os.remove(local_archive_path)
+
+        for filename, file_url in (extra_files or dict()).items():
+            download_file(file_url, tmp_cache_data / filename, verbose=verbose)
+        # the original location comes last
+        write_manifest(tmp_cache_data, url=as_url_list(urls)[-1])
+        # publish the data set
+        tmp_cache_data.rename(local_cache_data)
+        record_download(local_cache_data.name)
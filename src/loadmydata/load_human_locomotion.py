@@ -1,18 +1,25 @@
 import json
-import os
-import shutil
 from pathlib import Path
-from zipfile import ZipFile
+from typing import Optional
 
 import numpy as np
 import pandas as pd
-import requests
+from numpy.typing import DTypeLike
 from sklearn.utils import Bunch
-from tqdm import tqdm
 from yarl import URL
 
+from loadmydata.cache import (
+    data_file_exists,
+    enforce_cache_budget,
+    get_local_data_path,
+    mark_access,
+    open_data_file,
+    reading_dataset,
+)
 from loadmydata.config import CONFIG, HUMAN_LOCOMOTION_CODE_LIST
-from loadmydata.utils import get_local_data_path, is_directory_empty
+from loadmydata.containers import memory_cached
+from loadmydata.download import download_and_extract_archive, get_download_urls
+from loadmydata.utils import is_directory_empty
 
 DATASET_NAME = "HumanLocomotion"
 DATAFILE_NAME = "GaitData.zip"
@@ -52,9 +59,9 @@ def get_trial_filename(code: str) -> Path:
     """
     local_cache_data = get_local_data_path(DATASET_NAME)
     filename = local_cache_data / code
-    assert filename.with_suffix(
-        ".csv"
-    ).exists(), f"The code {code} cannot be found in the data set."
+    assert data_file_exists(
+        local_cache_data, filename.with_suffix(".csv").name
+    ), f"The code {code} cannot be found in the data set."
     return filename
 
 
@@ -66,60 +73,43 @@ def get_human_locomotion_download_link() -> URL:
     return CONFIG["human_locomotion_download_link"] / DATAFILE_NAME
 
 
-def download_from_remote_human_locomotion() -> None:
-    """Download and uncompress the human locomotion data set."""
+def download_from_remote_human_locomotion(verbose: bool = True) -> None:
+    """Download and uncompress the human locomotion data set.
+
+    Args:
+        verbose (bool): display a progress bar. Defaults to True.
+    """
     local_cache_data = get_local_data_path(DATASET_NAME)
-    local_archive_path = local_cache_data / DATAFILE_NAME
 
     if not local_cache_data.exists():
-        local_cache_data.mkdir(exist_ok=True, parents=True)
-
         # get archive's url
         remote_archive_path = get_human_locomotion_download_link()
-        response = requests.get(remote_archive_path, stream=True)
-        # handle the download progress bar
-        total_size_in_bytes = int(response.headers.get("content-length", 0))
-        block_size = 1024  # 1 Kibibyte
-        progress_bar = tqdm(
-            total=total_size_in_bytes, unit="iB", unit_scale=True
+        download_and_extract_archive(
+            get_download_urls(
+                remote_archive_path, "human_locomotion", DATAFILE_NAME
+            ),
+            DATAFILE_NAME,
+            local_cache_data,
+            verbose=verbose,
         )
-        # actual download
-        with open(local_archive_path, "wb") as handle:
-            for data in response.iter_content(block_size):
-                progress_bar.update(len(data))
-                handle.write(data)
-        progress_bar.close()
-        if total_size_in_bytes != 0 and progress_bar.n != total_size_in_bytes:
-            print(f"ERROR: the download of {DATAFILE_NAME} went wrong.")
-        # uncompress the data in the data folder
-        with ZipFile(local_archive_path, "r") as zf:
-            zf.extractall(local_cache_data)
-        # remove zip file
-        os.remove(local_archive_path)
-        # Check if the extracted directory contains a single sub-directory and
-        # no other file.
-        directory_list = [x for x in local_cache_data.iterdir() if x.is_dir()]
-        non_directory_list = [
-            x for x in local_cache_data.iterdir() if not x.is_dir()
-        ]
-        if len(directory_list) == 1 and len(non_directory_list) == 0:
-            sub_dir = directory_list[0]
-            for element in sub_dir.iterdir():
-                shutil.move(str(element), str(sub_dir.parent))
-            os.rmdir(str(sub_dir))
-
-
-def load_trial(code: str) -> pd.DataFrame:
+        enforce_cache_budget(keep=(DATASET_NAME,))
+    mark_access(DATASET_NAME)
+
+
+def load_trial(code: str, dtype: Optional[DTypeLike] = None) -> pd.DataFrame:
     """Returns the signal of the trial.
 
     Args:
         code (str): code of the trial ("Patient-Trial").
+        dtype (DTypeLike, optional): type of the columns, e.g. np.float32.
+            Defaults to None (float64).
 
     Returns:
         pd.DataFrame: Signal of the the trial, shape (n_sample, n_dimension).
     """
     fname = get_trial_filename(code)
-    df = pd.read_csv(fname.with_suffix(".csv"), sep=",")
+    with open_data_file(fname.parent, fname.with_suffix(".csv").name) as f:
+        df = pd.read_csv(f, sep=",", dtype=dtype)
     return df
 
 
@@ -135,14 +125,22 @@ def load_metadata(code):
         Metadata dictionary.
     """
     fname = get_trial_filename(code)
-    with open(fname.with_suffix(".json"), "r") as f:
+    with open_data_file(fname.parent, fname.with_suffix(".json").name) as f:
         metadata = json.load(f)
     return metadata
 
 
-def load_human_locomotion_dataset(code: str) -> Bunch:
+@memory_cached
+def load_human_locomotion_dataset(
+    code: str, dtype: Optional[DTypeLike] = None
+) -> Bunch:
     """Load the human locomotion data set.
 
+    Args:
+        code (str): code of the trial ("Patient-Trial").
+        dtype (DTypeLike, optional): type of the signal's columns, e.g.
+            np.float32. Defaults to None (float64).
+
     Returns:
         sklearn.utils.Bunch: (dict-like) the acceleration and angular velocity,
             the step indexes, the metadata and the description
@@ -150,8 +148,9 @@ def load_human_locomotion_dataset(code: str) -> Bunch:
     # check if in cache, othewise download data
     download_from_remote_human_locomotion()
     # get data
-    signal = load_trial(code)
-    metadata = load_metadata(code)
+    with reading_dataset(DATASET_NAME, download_from_remote_human_locomotion):
+        signal = load_trial(code, dtype=dtype)
+        metadata = load_metadata(code)
     left_steps = np.array(metadata.pop("LeftFootActivity"))
     right_steps = np.array(metadata.pop("RightFootActivity"))
 
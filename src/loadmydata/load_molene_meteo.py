@@ -1,28 +1,27 @@
 import json
-import os
-import shutil
 from pathlib import Path
-import tarfile
+from typing import Optional
 
 import numpy as np
 import pandas as pd
-import requests
+from numpy.typing import DTypeLike
 from sklearn.utils import Bunch
-from tqdm import tqdm
 from yarl import URL
 
-from loadmydata.config import CONFIG, HUMAN_LOCOMOTION_CODE_LIST
-from loadmydata.utils import (
-    get_local_data_path,
-    is_directory_empty,
+from loadmydata.cache import (
+    enforce_cache_budget,
     get_cache_home,
+    get_local_data_path,
+    mark_access,
+    reading_dataset,
 )
+from loadmydata.config import CONFIG, HUMAN_LOCOMOTION_CODE_LIST
+from loadmydata.containers import memory_cached
+from loadmydata.download import download_and_extract_archive, get_download_urls
+from loadmydata.utils import is_directory_empty
 
 DATASET_NAME = "MoleneMeteo"
 DATAFILE_NAME = "RADOMEH.tar.gz"
-README_DOWNLOAD_LINK = URL(
-    "https://www.data.gouv.fr/fr/datasets/r/80fb22dc-e155-4d5d-a02e-d263fa789fda"
-)
 README_FILENAME = "readme_radomeh.csv"
 
 DESCRIPTION = """The French national meteorological service made publicly available [1] a data set of hourly observations from a number of weather ground stations. Those stations are located in Brittany, France, and the data were collected during the month of January 2014. The stations recorded several meteorological variables, such as temperature, humidity, wind speed and direction, etc. Missing data (denoted by 'mq' in the original data) are replaced by NaNs.
@@ -73,68 +72,51 @@ def get_molene_meteo_download_link() -> URL:
     return CONFIG["molene_meteo_download_link"]
 
 
-def download_from_remote_molene_meteo() -> None:
-    """Download and uncompress the human locomotion data set."""
+def get_molene_meteo_readme_download_link() -> URL:
+    """Return the download link to the README of the Molene meteo data set."""
+    return CONFIG["molene_meteo_readme_download_link"]
+
+
+def download_from_remote_molene_meteo(verbose: bool = True) -> None:
+    """Download and uncompress the Molene meteo data set.
+
+    Args:
+        verbose (bool): display a progress bar. Defaults to True.
+    """
     local_cache_data = get_local_data_path(DATASET_NAME)
-    local_archive_path = local_cache_data / DATAFILE_NAME
 
     if not local_cache_data.exists():
-        local_cache_data.mkdir(exist_ok=True, parents=True)
-
         # get archive's url
         remote_archive_path = get_molene_meteo_download_link()
-        response = requests.get(remote_archive_path, stream=True)
-        # handle the download progress bar
-        total_size_in_bytes = int(response.headers.get("content-length", 0))
-        block_size = 1024  # 1 Kibibyte
-        progress_bar = tqdm(
-            total=total_size_in_bytes, unit="iB", unit_scale=True
-        )
-        # actual download
-        with open(local_archive_path, "wb") as handle:
-            for data in response.iter_content(block_size):
-                progress_bar.update(len(data))
-                handle.write(data)
-        progress_bar.close()
-        # if total_size_in_bytes != 0 and progress_bar.n != total_size_in_bytes:
-        #     print(f"ERROR: the download of {DATAFILE_NAME} went wrong.")
-        # TODO: Add an error management procedure.
-        # uncompress the data in the data folder
-        with tarfile.open(local_archive_path) as tar:
-            tar.extractall(local_cache_data)
-        # remove archive file
-        os.remove(local_archive_path)
-        # Check if the extracted directory contains a single sub-directory and
-        # no other file.
-        directory_list = [x for x in local_cache_data.iterdir() if x.is_dir()]
-        non_directory_list = [
-            x for x in local_cache_data.iterdir() if not x.is_dir()
-        ]
-        if len(directory_list) == 1 and len(non_directory_list) == 0:
-            sub_dir = directory_list[0]
-            for element in sub_dir.iterdir():
-                shutil.move(str(element), str(sub_dir.parent))
-            os.rmdir(str(sub_dir))
-
-        # Download README file
-        response = requests.get(README_DOWNLOAD_LINK, stream=True)
-        # handle the download progress bar
-        total_size_in_bytes = int(response.headers.get("content-length", 0))
-        block_size = 1024  # 1 Kibibyte
-        progress_bar = tqdm(
-            total=total_size_in_bytes, unit="iB", unit_scale=True
+        download_and_extract_archive(
+            get_download_urls(
+                remote_archive_path, "molene_meteo", DATAFILE_NAME
+            ),
+            DATAFILE_NAME,
+            local_cache_data,
+            extra_files={
+                README_FILENAME: get_download_urls(
+                    get_molene_meteo_readme_download_link(),
+                    "molene_meteo",
+                    README_FILENAME,
+                )
+            },
+            verbose=verbose,
         )
-        # actual download
-        with open(local_cache_data / README_FILENAME, "wb") as handle:
-            for data in response.iter_content(block_size):
-                progress_bar.update(len(data))
-                handle.write(data)
-        progress_bar.close()
+        enforce_cache_budget(keep=(DATASET_NAME,))
+    mark_access(DATASET_NAME)
 
 
-def load_molene_meteo_dataset() -> (pd.DataFrame, pd.DataFrame, str):
+@memory_cached
+def load_molene_meteo_dataset(
+    dtype: Optional[DTypeLike] = None,
+) -> (pd.DataFrame, pd.DataFrame, str):
     """Load the Molene meteo data set.
 
+    Args:
+        dtype (DTypeLike, optional): type of the floating point columns (the
+            measurements), e.g. np.float32. Defaults to None (float64).
+
     Returns:
         (pd.DataFrame, pd.DataFrame, str): the collected data, the weather
             stations' positions, and the description string.
@@ -142,21 +124,23 @@ def load_molene_meteo_dataset() -> (pd.DataFrame, pd.DataFrame, str):
     # check if in cache, othewise download data
     download_from_remote_molene_meteo()
 
-    # read the station information
-    local_cache_data = get_local_data_path(DATASET_NAME)
-    stations_df = pd.read_csv(
-        local_cache_data / README_FILENAME,
-        skiprows=43,
-        sep=";",
-        encoding="latin1",
-    )
+    # the data set is not evicted while it is read
+    with reading_dataset(
+        DATASET_NAME, download_from_remote_molene_meteo
+    ) as local_cache_data:
+        # read the station information
+        stations_df = pd.read_csv(
+            local_cache_data / README_FILENAME,
+            skiprows=43,
+            sep=";",
+            encoding="latin1",
+        )
 
-    # read the sensors' data
-    list_of_df = list()
-    for fname in local_cache_data.iterdir():
-        if fname.suffix == ".txt":
-            list_of_df.append(
-                pd.read_csv(
+        # read the sensors' data
+        list_of_df = list()
+        for fname in local_cache_data.iterdir():
+            if fname.suffix == ".txt":
+                df = pd.read_csv(
                     fname,
                     converters={
                         "date": pd.to_datetime,
@@ -167,8 +151,13 @@ def load_molene_meteo_dataset() -> (pd.DataFrame, pd.DataFrame, str):
                     engine="python",
                     na_values="mq",
                 )
-            )
-    data_df = pd.concat(list_of_df).drop("Unnamed: 29", axis=1)
+                if dtype is not None:
+                    # cast file by file, so that the concatenation is done in the
+                    # requested type
+                    float_columns = df.select_dtypes("float").columns
+                    df[float_columns] = df[float_columns].astype(dtype)
+                list_of_df.append(df)
+        data_df = pd.concat(list_of_df).drop("Unnamed: 29", axis=1)
 
     # add the station name in the data
     station_name_converter_dict = dict(
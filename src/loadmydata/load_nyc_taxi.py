@@ -1,13 +1,24 @@
 import datetime as dt
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import pandas as pd
-import requests
+from numpy.typing import DTypeLike
 from yarl import URL
 
+from loadmydata.cache import (
+    dataset_lock,
+    enforce_cache_budget,
+    get_local_data_path,
+    mark_access,
+    reading_dataset,
+    record_download,
+    write_manifest,
+)
 from loadmydata.config import CONFIG
-from loadmydata.utils import get_local_data_path
+from loadmydata.containers import memory_cached
+from loadmydata.download import download_file, get_download_urls
 
 DATASET_NAME = "NYCTaxi"
 DATAFILE_NAME = "nyc_taxi.csv"
@@ -47,26 +58,55 @@ def get_nyc_taxi_download_link() -> URL:
     return CONFIG["nyc_taxi_download_link"] / DATAFILE_NAME
 
 
-def load_nyc_taxi_dataset() -> (pd.DataFrame, np.ndarray, str):
-    """Load (X, y) from a .csv file.
+def download_from_remote_nyc_taxi(verbose: bool = True) -> None:
+    """Download the NYC taxi data set.
 
-    The shape of X is (n_samples, 2): [timestamp, value]. The shape of y
-    is (n_anomalies,).
+    Args:
+        verbose (bool): display a progress bar. Defaults to True.
     """
     local_cache_data = get_local_data_path(DATASET_NAME)
     local_archive_path = local_cache_data / DATAFILE_NAME
-    if not local_cache_data.exists():
-        local_cache_data.mkdir(exist_ok=True, parents=True)
-        # get archive's url
-        remote_archive_path = get_nyc_taxi_download_link()
-        response = requests.get(remote_archive_path, stream=True)
-        with open(local_archive_path, "w") as handle:
-            print(response.text, file=handle)
+
+    if not local_archive_path.exists():
+        with dataset_lock(DATASET_NAME):
+            local_cache_data.mkdir(exist_ok=True, parents=True)
+            # get archive's url
+            remote_archive_path = get_nyc_taxi_download_link()
+            download_file(
+                get_download_urls(
+                    remote_archive_path, "nyc_taxi", DATAFILE_NAME
+                ),
+                local_archive_path,
+                verbose=verbose,
+            )
+            write_manifest(local_cache_data, url=remote_archive_path)
+            record_download(DATASET_NAME)
+        enforce_cache_budget(keep=(DATASET_NAME,))
+    mark_access(DATASET_NAME)
+
+
+@memory_cached
+def load_nyc_taxi_dataset(
+    dtype: Optional[DTypeLike] = None,
+) -> (pd.DataFrame, np.ndarray, str):
+    """Load (X, y) from a .csv file.
+
+    The shape of X is (n_samples, 2): [timestamp, taxi_count]. The shape of y
+    is (n_anomalies,). The type of the `taxi_count` column is `dtype` (by
+    default, the type inferred by pandas, i.e. int64).
+    """
+    # check if in cache, othewise download data
+    download_from_remote_nyc_taxi()
 
     # load from downloaded (or cached) files
-    X = pd.read_csv(local_archive_path, parse_dates=["timestamp"]).rename(
-        {"value": "taxi_count"}, axis=1
-    )
+    with reading_dataset(
+        DATASET_NAME, download_from_remote_nyc_taxi
+    ) as local_cache_data:
+        X = pd.read_csv(
+            local_cache_data / DATAFILE_NAME,
+            parse_dates=["timestamp"],
+            dtype=None if dtype is None else {"value": dtype},
+        ).rename({"value": "taxi_count"}, axis=1)
     y = np.array(
         [
             read_timestamps_str(timestamp_str)
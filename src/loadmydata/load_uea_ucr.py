@@ -1,59 +1,523 @@
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
+from typing import (
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 import numpy.ma as ma
 from numpy.ma.core import MaskedArray
-from scipy.io.arff import loadarff
+from numpy.typing import DTypeLike
 
 from sklearn.utils import Bunch
-from loadmydata.padding import pad_at_the_end
+from loadmydata.cache import (
+    data_file_exists,
+    enforce_cache_budget,
+    get_data_file_signature,
+    get_derived_data_path,
+    get_local_data_path,
+    open_data_file,
+    reading_dataset,
+    record_derived_files,
+)
+from loadmydata.config import CONFIG
+from loadmydata.containers import LazyBunch, memory_cached
+from loadmydata.padding import RaggedArray, get_mask_from_lengths
+from loadmydata.parsers import (
+    index_arff_rows,
+    index_ts_rows,
+    iter_arff,
+    iter_ts,
+    parse_arff,
+    parse_arff_rows,
+    parse_ts,
+    parse_ts_rows,
+    read_arff_header,
+    read_ts_header,
+)
 from loadmydata.utils import (
     download_from_remote_uea_ucr,
-    get_local_data_path,
     get_uea_ucr_download_link,
 )
 
+# incremented when the content of the binary cache changes
+PARSED_DATA_VERSION = 2
+LAYOUTS = ("masked", "padded", "ragged", "auto")
+
+
+def get_masked_array(X_data: np.ndarray, lengths: np.ndarray) -> MaskedArray:
+    """Return a padded data set as a masked array (the padding is masked)."""
+    _, max_size, n_dims = X_data.shape
+    return ma.masked_array(
+        X_data, mask=get_mask_from_lengths(lengths, max_size, n_dims)
+    )
 
-def load_Xy_from_arff(data_path: Path) -> (MaskedArray, np.ndarray):
-    """Load (X, y) from a .arff file.
+
+def load_Xy_from_arff(
+    data_path: Union[Path, TextIO], dtype: DTypeLike = float
+) -> (MaskedArray, np.ndarray):
+    """Load (X, y) from a .arff file (path or text file object).
+
+    The shape of X is (n_series, n_samples, n_dims). The shape of y is
+    (n_series,). Signals shorter than n_samples are padded at the end with
+    NaNs, which are masked. X is of type `dtype` (float64 by default).
+    """
+    if isinstance(data_path, Path):
+        with open(data_path, "r") as f:
+            return load_Xy_from_arff(f, dtype=dtype)
+
+    X_data, lengths, y = parse_arff(data_path, dtype=dtype)
+    return get_masked_array(X_data, lengths), y
+
+
+def load_Xy_from_ts(
+    data_path: Union[Path, TextIO], dtype: DTypeLike = float
+) -> (MaskedArray, np.ndarray):
+    """Load (X, y) from a .ts file (path or text file object).
 
     The shape of X is (n_series, n_samples, n_dims). The shape of y is
-    (n_series,).
-    """
-
-    # load from downloaded (or cached) files
-    data, meta = loadarff(data_path)
-    names = meta.names()
-    target = names[-1]
-    # are the data multivariate or univariate?
-    is_multivariate = len(names) == 2
-    is_univariate = not is_multivariate
-    # load y, the target variable
-    y = data[target].view().astype(str)
-    # load X, the attributes
-    if is_univariate:
-        keep_col = [col for col in names if col != target]
-        X_raw = data[keep_col].view()
-    elif is_multivariate:
-        X_raw = data[names[0]].view()
-
-    X = list()
-    for signal in X_raw:
-        if is_multivariate:
-            X.append(np.array(signal.tolist()).T)
-        elif is_univariate:
-            X.append(np.array(signal.tolist()).T.reshape(-1, 1))
-
-    max_size = max(signal.shape[0] for signal in X)
-
-    X = ma.stack(
-        [pad_at_the_end(signal, max_size - signal.shape[0]) for signal in X]
+    (n_series,). Signals shorter than n_samples are padded at the end with
+    NaNs, which are masked. X is of type `dtype` (float64 by default).
+    """
+    if isinstance(data_path, Path):
+        with open(data_path, "r") as f:
+            return load_Xy_from_ts(f, dtype=dtype)
+
+    X_data, lengths, y = parse_ts(data_path, dtype=dtype)
+    return get_masked_array(X_data, lengths), y
+
+
+def get_parsed_data_paths(
+    local_cache_data: Path, filename: str, dtype: DTypeLike = float
+) -> Dict[str, Path]:
+    """Return the paths of the binary cache of a .arff or .ts file.
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, e.g. `ArrowHead_TRAIN.arff`.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+
+    Returns:
+        dict: paths of the "X", "lengths" and "y" arrays (.npy files) and of
+            the "info" file (.json file, which identifies the source file).
+    """
+    derived_data_path = get_derived_data_path(local_cache_data)
+    prefix = f"{filename}.{np.dtype(dtype).name}"
+    paths = {
+        key: derived_data_path / f"{prefix}.{key}.npy"
+        for key in ("X", "lengths", "y")
+    }
+    paths["info"] = derived_data_path / f"{prefix}.json"
+    return paths
+
+
+def load_cached_arrays(
+    local_cache_data: Path, filename: str, dtype: DTypeLike = float
+) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Return the arrays of the binary cache of a .arff or .ts file (X is
+    memory-mapped, copy-on-write), or None if they are not in cache or if
+    the source file has changed (see `load_parsed_arrays`).
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, e.g. `ArrowHead_TRAIN.arff`.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray) or None: X, lengths and y.
+    """
+    paths = get_parsed_data_paths(local_cache_data, filename, dtype)
+    if not paths["info"].exists():
+        return None
+    with open(paths["info"], "r") as f:
+        if json.load(f) != {
+            "source": get_data_file_signature(local_cache_data, filename),
+            "version": PARSED_DATA_VERSION,
+        }:
+            return None
+    X_data = np.load(paths["X"], mmap_mode="c")
+    lengths = np.load(paths["lengths"])
+    y = np.load(paths["y"])
+    return X_data, lengths, y
+
+
+def load_parsed_arrays(
+    local_cache_data: Path,
+    filename: str,
+    dtype: DTypeLike = float,
+    executor: Optional[Executor] = None,
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """Parse a .arff or .ts file of a data folder, with a binary cache.
+
+    The first time, the file is parsed and the arrays are saved as .npy files
+    in the data folder (see `CONFIG["cache_parsed_data"]`). The next times,
+    they are memory-mapped (copy-on-write) from those files, unless the
+    source file has changed (size or modification time). There is one cache
+    per dtype, the values are parsed directly into the requested type.
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, e.g. `ArrowHead_TRAIN.arff`.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+        executor (Executor, optional): process pool used to parse large files
+            by chunks (see `loadmydata.parsers.rows_to_array`). Defaults to
+            None.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): X of shape (n_series,
+            n_samples, n_dims) padded with NaNs, the lengths of the signals of
+            shape (n_series,) and y of shape (n_series,).
+    """
+    parse = parse_ts if filename.endswith(".ts") else parse_arff
+    if not CONFIG["cache_parsed_data"]:
+        with open_data_file(local_cache_data, filename) as f:
+            return parse(io.TextIOWrapper(f), dtype=dtype, executor=executor)
+
+    cached_arrays = load_cached_arrays(local_cache_data, filename, dtype)
+    if cached_arrays is not None:
+        return cached_arrays
+
+    with open_data_file(local_cache_data, filename) as f:
+        X_data, lengths, y = parse(
+            io.TextIOWrapper(f), dtype=dtype, executor=executor
+        )
+    signature = get_data_file_signature(local_cache_data, filename)
+    paths = get_parsed_data_paths(local_cache_data, filename, dtype)
+    try:
+        paths["info"].parent.mkdir(exist_ok=True)
+        # write to temporary files first, the info file comes last
+        suffix = f".{os.getpid()}.tmp"
+        for key, array in (("X", X_data), ("lengths", lengths), ("y", y)):
+            with open(str(paths[key]) + suffix, "wb") as f:
+                np.save(f, array)
+            os.replace(str(paths[key]) + suffix, paths[key])
+        with open(str(paths["info"]) + suffix, "w") as f:
+            json.dump({"source": signature, "version": PARSED_DATA_VERSION}, f)
+        os.replace(str(paths["info"]) + suffix, paths["info"])
+        record_derived_files(local_cache_data.name)
+        # the new files may exceed `CONFIG["cache_max_bytes"]`
+        enforce_cache_budget(keep=(local_cache_data.name,))
+    except OSError:
+        # the cache is optional (e.g. read-only data folder)
+        pass
+    return X_data, lengths, y
+
+
+def load_row_index(
+    local_cache_data: Path, filename: str
+) -> (dict, np.ndarray):
+    """Return the header of a .arff or .ts file of a data folder and the byte
+    offsets of its series.
+
+    The index is built the first time (one pass over the file, without
+    parsing the values) and saved next to the binary cache (see
+    `CONFIG["cache_parsed_data"]`), unless the source file has changed.
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, e.g. `ArrowHead_TRAIN.arff`.
+
+    Returns:
+        (dict, np.ndarray): the header and the offsets, shape (n_series,).
+    """
+    derived_data_path = get_derived_data_path(local_cache_data)
+    offsets_path = derived_data_path / f"{filename}.rows.npy"
+    info_path = derived_data_path / f"{filename}.rows.json"
+    signature = get_data_file_signature(local_cache_data, filename)
+    if CONFIG["cache_parsed_data"] and info_path.exists():
+        with open(info_path, "r") as f:
+            info = json.load(f)
+        if info["source"] == signature and (
+            info["version"] == PARSED_DATA_VERSION
+        ):
+            return info["header"], np.load(offsets_path)
+
+    index_rows = index_ts_rows if filename.endswith(".ts") else index_arff_rows
+    with open_data_file(local_cache_data, filename) as f:
+        header, offsets = index_rows(f)
+    if CONFIG["cache_parsed_data"]:
+        try:
+            derived_data_path.mkdir(exist_ok=True)
+            suffix = f".{os.getpid()}.tmp"
+            with open(str(offsets_path) + suffix, "wb") as f:
+                np.save(f, offsets)
+            os.replace(str(offsets_path) + suffix, offsets_path)
+            with open(str(info_path) + suffix, "w") as f:
+                json.dump(
+                    {
+                        "source": signature,
+                        "version": PARSED_DATA_VERSION,
+                        "header": header,
+                    },
+                    f,
+                )
+            os.replace(str(info_path) + suffix, info_path)
+            record_derived_files(local_cache_data.name)
+            enforce_cache_budget(keep=(local_cache_data.name,))
+        except OSError:
+            # the cache is optional (e.g. read-only data folder)
+            pass
+    return header, offsets
+
+
+def load_parsed_rows(
+    local_cache_data: Path,
+    filename: str,
+    indices: np.ndarray,
+    dtype: DTypeLike = float,
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """Parse some series of a .arff or .ts file of a data folder.
+
+    If the file is in the binary cache (see `load_parsed_arrays`), the series
+    are read from the cached arrays. Otherwise, only the requested series are
+    parsed, thanks to an index of their byte offsets (see `load_row_index`).
+    In both cases, n_samples is the same as for the whole file.
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, e.g. `ArrowHead_TRAIN.arff`.
+        indices (np.ndarray): indices (or boolean mask) of the series.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): X of shape (n_indices,
+            n_samples, n_dims) padded with NaNs, the lengths of the signals of
+            shape (n_indices,) and y of shape (n_indices,).
+    """
+    indices = np.asarray(indices)
+    indices = (
+        np.flatnonzero(indices)
+        if indices.dtype == bool
+        else indices.astype(np.int64)
+    )
+    if CONFIG["cache_parsed_data"]:
+        cached_arrays = load_cached_arrays(local_cache_data, filename, dtype)
+        if cached_arrays is not None:
+            X_data, lengths, y = cached_arrays
+            return X_data[indices], lengths[indices], y[indices]
+
+    header, offsets = load_row_index(local_cache_data, filename)
+    # read the file once and forward, each series once
+    offsets, inverse = np.unique(offsets[indices], return_inverse=True)
+    parse_rows = parse_ts_rows if filename.endswith(".ts") else parse_arff_rows
+    with open_data_file(local_cache_data, filename) as f:
+        X_data, lengths, y = parse_rows(f, header, offsets, dtype=dtype)
+    return X_data[inverse], lengths[inverse], y[inverse]
+
+
+def read_declared_classes(local_cache_data: Path, filename: str) -> List[str]:
+    """Return the class values declared in the header of a .arff or .ts file
+    of a data folder (empty if there are none)."""
+    read_header = (
+        read_ts_header if filename.endswith(".ts") else read_arff_header
+    )
+    with open_data_file(local_cache_data, filename) as f:
+        classes = read_header(io.TextIOWrapper(f))["classes"]
+    return classes or list()
+
+
+def get_ts_n_samples(local_cache_data: Path, filenames: Iterable[str]) -> int:
+    """Return the length of the longest series of .ts files of a data folder.
+
+    The splits of a data set are padded to this common length, like .arff
+    files (whose series all have the number of attributes of the header).
+    The length declared in the header is used when the series have equal
+    lengths; otherwise the longest series is measured with the row index (see
+    `load_row_index`), without tokenizing the values.
+
+    Args:
+        local_cache_data (Path): data folder.
+        filenames (iterable of str): names of the .ts files.
+    """
+    n_samples = 0
+    for filename in filenames:
+        with open_data_file(local_cache_data, filename) as f:
+            header = read_ts_header(io.TextIOWrapper(f))
+        if not header["is_equal_length"] or header["n_samples"] is None:
+            header, _ = load_row_index(local_cache_data, filename)
+        n_samples = max(n_samples, header["n_samples"])
+    return n_samples
+
+
+def pad_samples(X_data: np.ndarray, n_samples: int) -> np.ndarray:
+    """Pad series at the end with NaNs, to `n_samples` samples.
+
+    Args:
+        X_data (np.ndarray): shape (n_series, n_samples_in, n_dims), with
+            n_samples_in <= n_samples (returned as is if equal).
+        n_samples (int): length of the padded series.
+    """
+    if X_data.shape[1] == n_samples:
+        return X_data
+    return np.pad(
+        X_data,
+        ((0, 0), (0, n_samples - X_data.shape[1]), (0, 0)),
+        constant_values=np.nan,
+    )
+
+
+def encode_labels_of_splits(
+    y_list: List[np.ndarray], classes: Iterable[str] = ()
+) -> (np.ndarray, List[np.ndarray]):
+    """Encode the labels of several splits consistently.
+
+    The classes are sorted (as with `sklearn.preprocessing.LabelEncoder`) and
+    the codes have the smallest unsigned integer type that fits.
+
+    Args:
+        y_list (list of np.ndarray): labels of each split.
+        classes (iterable of str): additional classes, e.g. declared in the
+            header of the files. Defaults to ().
+
+    Returns:
+        (np.ndarray, list of np.ndarray): the classes, shape (n_classes,),
+            and the codes of each split.
+    """
+    classes = np.unique(
+        np.concatenate([np.array(list(classes), dtype=str)] + y_list)
     )
+    codes_dtype = np.min_scalar_type(max(len(classes) - 1, 0))
+    return classes, [
+        np.searchsorted(classes, y).astype(codes_dtype) for y in y_list
+    ]
 
-    return X, y
 
+def get_process_pool(n_jobs: int = 1) -> ContextManager[Optional[Executor]]:
+    """Return a process pool with `n_jobs` workers (all CPUs if -1), to be
+    used as a context manager. If `n_jobs` is 1, the context manager returns
+    None (no pool).
 
-def load_uea_ucr_data(name: str) -> Bunch:
+    The workers are not forked from the current process, which can be
+    multi-threaded (e.g. the two splits are parsed in threads): they are
+    started by a fork server (or spawned, if fork servers are not
+    available).
+    """
+    assert n_jobs == -1 or n_jobs >= 1, f"Invalid n_jobs: {n_jobs}."
+    if n_jobs == 1:
+        return nullcontext()
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # only has an effect if the fork server is not running yet
+        context.set_forkserver_preload(["loadmydata.parsers"])
+    else:
+        context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(
+        max_workers=None if n_jobs == -1 else n_jobs, mp_context=context
+    )
+
+
+def get_X_with_layout(
+    X_data: np.ndarray, lengths: np.ndarray, layout: str = "masked"
+) -> Union[MaskedArray, RaggedArray, np.ndarray]:
+    """Return a NaN-padded data set in the requested layout.
+
+    Args:
+        X_data (np.ndarray): padded data set, shape (N, T, d).
+        lengths (np.ndarray): number of samples of each signal, shape (N,).
+        layout (str): "masked" (MaskedArray), "padded" (the NaN-padded array
+            as is, the mask can be obtained with
+            `loadmydata.padding.get_mask_from_lengths`), "ragged"
+            (RaggedArray, without padding) or "auto" (plain array if all
+            signals have the same length, otherwise MaskedArray). Defaults to
+            "masked".
+
+    Returns:
+        MaskedArray, np.ndarray or RaggedArray: the data set.
+    """
+    assert layout in LAYOUTS, f"Unknown layout: '{layout}'."
+    if layout == "auto":
+        _, max_size, _ = X_data.shape
+        layout = "padded" if np.all(lengths == max_size) else "masked"
+    if layout == "ragged":
+        return RaggedArray.from_padded(X_data, lengths)
+    if layout == "padded":
+        return X_data
+    return get_masked_array(X_data, lengths)
+
+
+def load_Xy_from_cache(
+    local_cache_data: Path,
+    filename: str,
+    layout: str = "masked",
+    dtype: DTypeLike = float,
+) -> (Union[MaskedArray, RaggedArray, np.ndarray], np.ndarray):
+    """Load (X, y) from a .arff or .ts file of a data folder, with a binary
+    cache (see `load_parsed_arrays`).
+
+    Args:
+        local_cache_data (Path): data folder.
+        filename (str): name of the file, e.g. `ArrowHead_TRAIN.arff`.
+        layout (str): "masked", "padded", "ragged" or "auto" (see
+            `get_X_with_layout`). Defaults to "masked".
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+
+    Returns:
+        (MaskedArray, np.ndarray or RaggedArray, np.ndarray): X of shape
+            (n_series, n_samples, n_dims) and y of shape (n_series,).
+    """
+    X_data, lengths, y = load_parsed_arrays(
+        local_cache_data, filename, dtype=dtype
+    )
+    return get_X_with_layout(X_data, lengths, layout), y
+
+
+def get_uea_ucr_file_format(name: str, file_format: str = "auto") -> str:
+    """Return the format of the files to read for a cached data set.
+
+    Args:
+        name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+        file_format (str): "ts", "arff" or "auto". With "auto", .ts files
+            (faster to parse) are used if they are in the archive, otherwise
+            .arff files. Defaults to "auto".
+
+    Returns:
+        str: "ts" or "arff".
+    """
+    assert file_format in (
+        "auto",
+        "ts",
+        "arff",
+    ), f"Unknown file format: '{file_format}'."
+    if file_format == "auto":
+        data_path = get_local_data_path(name)
+        if data_file_exists(data_path, f"{name}_TRAIN.ts") and (
+            data_file_exists(data_path, f"{name}_TEST.ts")
+        ):
+            return "ts"
+        return "arff"
+    return file_format
+
+
+@memory_cached
+def load_uea_ucr_data(
+    name: str,
+    file_format: str = "auto",
+    layout: str = "masked",
+    dtype: DTypeLike = float,
+    lazy: bool = False,
+    n_jobs: int = 1,
+    indices: Optional[Union[np.ndarray, Dict[str, np.ndarray]]] = None,
+    encode_labels: bool = False,
+) -> Bunch:
     """Return data for the given data set.
 
     The data are contained in a `DataSet` instance.
@@ -64,32 +528,237 @@ def load_uea_ucr_data(name: str) -> Bunch:
 
     Args:
         name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+        file_format (str): format of the files to read, "ts", "arff" or
+            "auto" (.ts files if available, since they are faster to parse,
+            otherwise .arff files). Defaults to "auto".
+        layout (str): "masked" (padded MaskedArray), "padded" (NaN-padded
+            np.ndarray, without mask), "ragged"
+            (`loadmydata.padding.RaggedArray`, without padding) or "auto"
+            (np.ndarray if all signals have the same length, otherwise
+            MaskedArray). Defaults to "masked".
+        dtype (DTypeLike): floating point type of the time series, e.g.
+            np.float32. Defaults to float (float64).
+        lazy (bool): if True, the files are only parsed when the data are
+            first accessed (e.g. reading `y_test` or `description` does not
+            parse the training set), see `loadmydata.containers.LazyBunch`.
+            The data set is still downloaded if needed. Defaults to False.
+        n_jobs (int): number of worker processes used to parse the files
+            (-1 for all CPUs). With more than one job, the training and test
+            sets are parsed concurrently and large files are split into
+            chunks parsed in parallel; the values are sent back through
+            shared memory. Only used when the files are not already in the
+            binary cache. Defaults to 1.
+        indices (array-like or dict, optional): indices (or boolean mask) of
+            the series to load, in both splits, or a dict with keys "train"
+            and/or "test" (the splits without key are loaded entirely). Only
+            the requested series are parsed: the first time, the byte offsets
+            of the series are indexed (and saved in the data folder).
+            Defaults to None (all series).
+        encode_labels (bool): if True, y_train and y_test are integer codes
+            (smallest unsigned type that fits) and the classes are in
+            `classes_`, so that `classes_[y_train]` are the labels. The
+            classes are sorted and contain the labels of both splits and the
+            class values declared in the files, so the codes are consistent
+            between subsets (see `indices`). Defaults to False.
 
     Returns:
-        [sklearn.util.Bunch]: (dict-like) X_train, X_test, y_train, y_test, url
-            and description of the data set.
+        [sklearn.util.Bunch]: (dict-like) X_train, X_test, y_train, y_test,
+            lengths_train, lengths_test (number of samples of each signal),
+            url and description of the data set, and classes_ (with
+            `encode_labels`).
     """
 
     # download data
     download_from_remote_uea_ucr(name)
+    download = partial(download_from_remote_uea_ucr, name)
     # get data path
     data_path = get_local_data_path(name)
-    data_path_train = data_path / Path(f"{name}_TRAIN.arff")
-    data_path_test = data_path / Path(f"{name}_TEST.arff")
-    data_path_description = data_path / Path(f"{name}.txt")
-    # load X, y for train and test
-    X_train, y_train = load_Xy_from_arff(data_path_train)
-    X_test, y_test = load_Xy_from_arff(data_path_test)
-    # load description
-    with open(data_path_description, encoding="ISO-8859-1") as f:
-        description = f.read()
-
-    return Bunch(
-        X_train=X_train,
-        y_train=y_train,
-        X_test=X_test,
-        y_test=y_test,
-        description=description,
-        url=(get_uea_ucr_download_link() / (name + ".zip")),
-        location=data_path.absolute().resolve(),
+    # load X, y for train and test (each split is parsed once)
+    with reading_dataset(name, download):
+        file_format = get_uea_ucr_file_format(name, file_format)
+    if isinstance(indices, dict):
+        assert set(indices) <= {
+            "train",
+            "test",
+        }, f"Unknown splits: {set(indices) - {'train', 'test'}}."
+    splits = dict()
+    n_samples = dict()
+
+    def parse_split(split: str, executor: Optional[Executor] = None) -> None:
+        filename = f"{name}_{split}.{file_format}"
+        split_indices = (
+            indices.get(split.lower())
+            if isinstance(indices, dict)
+            else indices
+        )
+        if split_indices is None:
+            splits[split] = load_parsed_arrays(
+                data_path, filename, dtype=dtype, executor=executor
+            )
+        else:
+            splits[split] = load_parsed_rows(
+                data_path, filename, split_indices, dtype=dtype
+            )
+        if file_format == "ts":
+            # .ts files are padded to their longest series, pad both splits
+            # to the same length
+            if "ts" not in n_samples:
+                n_samples["ts"] = get_ts_n_samples(
+                    data_path,
+                    [f"{name}_{split}.ts" for split in ("TRAIN", "TEST")],
+                )
+            X_data, lengths, y = splits[split]
+            splits[split] = (
+                pad_samples(X_data, n_samples["ts"]),
+                lengths,
+                y,
+            )
+
+    def load_split(split: str) -> (np.ndarray, np.ndarray, np.ndarray):
+        if split not in splits:
+            with get_process_pool(n_jobs) as executor:
+                parse_split(split, executor)
+        return splits[split]
+
+    def load_description() -> str:
+        with open_data_file(data_path, f"{name}.txt") as f:
+            return f.read().decode("ISO-8859-1")
+
+    def load_X(split: str) -> Union[MaskedArray, RaggedArray, np.ndarray]:
+        X_data, lengths, _ = load_split(split)
+        return get_X_with_layout(X_data, lengths, layout)
+
+    labels = dict()
+
+    def load_labels() -> dict:
+        # classes and codes of both splits, computed once
+        if len(labels) == 0:
+            declared_classes = set()
+            for split in ("TRAIN", "TEST"):
+                declared_classes.update(
+                    read_declared_classes(
+                        data_path, f"{name}_{split}.{file_format}"
+                    )
+                )
+            classes, (codes_train, codes_test) = encode_labels_of_splits(
+                [load_split("TRAIN")[2], load_split("TEST")[2]],
+                classes=declared_classes,
+            )
+            labels.update(classes=classes, TRAIN=codes_train, TEST=codes_test)
+        return labels
+
+    def load_y(split: str) -> np.ndarray:
+        if encode_labels:
+            return load_labels()[split]
+        return load_split(split)[2]
+
+    def load_lengths(split: str) -> np.ndarray:
+        return load_split(split)[1]
+
+    loaders = dict(
+        X_train=partial(load_X, "TRAIN"),
+        y_train=partial(load_y, "TRAIN"),
+        X_test=partial(load_X, "TEST"),
+        y_test=partial(load_y, "TEST"),
+        lengths_train=partial(load_lengths, "TRAIN"),
+        lengths_test=partial(load_lengths, "TEST"),
+        description=load_description,
     )
+    if encode_labels:
+        loaders["classes_"] = lambda: load_labels()["classes"]
+    url = get_uea_ucr_download_link() / (name + ".zip")
+    location = data_path.absolute().resolve()
+    if lazy:
+
+        def read_locked(load: Callable) -> Callable:
+            def load_locked():
+                # the data set may have been evicted since the call
+                with reading_dataset(name, download):
+                    return load()
+
+            return load_locked
+
+        return LazyBunch(
+            {key: read_locked(load) for key, load in loaders.items()},
+            url=url,
+            location=location,
+        )
+    with reading_dataset(name, download):
+        if n_jobs != 1:
+            # parse both splits at the same time, with a shared process pool
+            with get_process_pool(n_jobs) as executor:
+                with ThreadPoolExecutor(max_workers=2) as threads:
+                    list(
+                        threads.map(
+                            partial(parse_split, executor=executor),
+                            ("TRAIN", "TEST"),
+                        )
+                    )
+        return Bunch(
+            **{key: load() for key, load in loaders.items()},
+            url=url,
+            location=location,
+        )
+
+
+def iter_uea_ucr(
+    name: str,
+    split: str = "train",
+    batch_size: int = 256,
+    file_format: str = "auto",
+    layout: str = "masked",
+    dtype: DTypeLike = float,
+) -> Iterator[Tuple[Union[MaskedArray, RaggedArray, np.ndarray], np.ndarray]]:
+    """Iterate over a split of a data set by batches of series.
+
+    The data set is downloaded if needed. If the split is in the binary cache
+    (see `load_parsed_arrays`), the batches are read from the memory-mapped
+    arrays. Otherwise, the file is parsed batch by batch and only one batch
+    is held in memory at a time (the binary cache is not written).
+
+    Args:
+        name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+        split (str): "train" or "test". Defaults to "train".
+        batch_size (int): number of series per batch. Defaults to 256.
+        file_format (str): "ts", "arff" or "auto" (see
+            `load_uea_ucr_data`). Defaults to "auto".
+        layout (str): "masked", "padded", "ragged" or "auto" (see
+            `load_uea_ucr_data`). Defaults to "masked".
+        dtype (DTypeLike): floating point type of the time series. Defaults
+            to float.
+
+    Yields:
+        (MaskedArray, np.ndarray or RaggedArray, np.ndarray): X_batch of shape
+            (batch_size, n_samples, n_dims) and y_batch of shape
+            (batch_size,). The last batch can be smaller. When a .ts file of
+            unequal-length series is parsed, each batch is padded to the
+            length of its longest series.
+    """
+    assert split in ("train", "test"), f"Unknown split: '{split}'."
+    assert batch_size > 0, f"batch_size (={batch_size}) must be positive."
+    download_from_remote_uea_ucr(name)
+    # the data set is not evicted until the iteration is over
+    with reading_dataset(
+        name, partial(download_from_remote_uea_ucr, name)
+    ) as data_path:
+        file_format = get_uea_ucr_file_format(name, file_format)
+        filename = f"{name}_{split.upper()}.{file_format}"
+
+        cached_arrays = None
+        if CONFIG["cache_parsed_data"]:
+            cached_arrays = load_cached_arrays(data_path, filename, dtype)
+        if cached_arrays is not None:
+            X_data, lengths, y = cached_arrays
+            for start in range(0, len(y), batch_size):
+                batch = slice(start, start + batch_size)
+                yield get_X_with_layout(
+                    X_data[batch], lengths[batch], layout
+                ), y[batch]
+            return
+
+        iter_batches = iter_ts if file_format == "ts" else iter_arff
+        with open_data_file(data_path, filename) as f:
+            for X_data, lengths, y in iter_batches(
+                io.TextIOWrapper(f), batch_size=batch_size, dtype=dtype
+            ):
+                yield get_X_with_layout(X_data, lengths, layout), y
@@ -1,9 +1,14 @@
+from typing import Iterator, Optional, Tuple, Union
+
 import numpy as np
 import numpy.ma as ma
 from numpy.ma.core import MaskedArray
+from numpy.typing import DTypeLike
 
 
-def pad_at_the_end(signal: np.ndarray, pad_width: int) -> MaskedArray:
+def pad_at_the_end(
+    signal: np.ndarray, pad_width: int, dtype: DTypeLike = float
+) -> MaskedArray:
     assert pad_width >= 0, f"pad_width (={pad_width}) must be positive."
 
     if signal.ndim == 1:
@@ -14,7 +19,7 @@ def pad_at_the_end(signal: np.ndarray, pad_width: int) -> MaskedArray:
 
     return ma.masked_array(
         data=np.pad(
-            signal.reshape(n_samples, n_dims).astype(float),
+            signal.reshape(n_samples, n_dims).astype(dtype, copy=False),
             pad_width=((0, pad_width), (0, 0)),
             mode="constant",
             constant_values=(np.nan,),
@@ -23,10 +28,313 @@ def pad_at_the_end(signal: np.ndarray, pad_width: int) -> MaskedArray:
     )
 
 
-def get_signal_shape(signal_padded: MaskedArray) -> tuple[int, int]:
-    err_msg = "Wrong dimensions: {signal_padded.shape}. Expected: (n_samples, n_dims)."
+def get_signal_shape(signal_padded: np.ndarray) -> tuple[int, int]:
+    """Return the true shape (without padding) of a padded signal.
+
+    For a masked array, the padding is the masked suffix and its start is
+    found by binary search on the mask. For a plain array, the padding is
+    made of the trailing samples that are NaN in all dimensions.
+
+    Args:
+        signal_padded (np.ndarray): masked or NaN-padded signal, shape
+            (n_samples_padded, n_dims).
+
+    Returns:
+        tuple[int, int]: (n_samples, n_dims).
+    """
+    err_msg = f"Wrong dimensions: {signal_padded.shape}. Expected: (n_samples, n_dims)."
     assert signal_padded.ndim == 2, err_msg
 
     padded_size, n_dims = signal_padded.shape
-    n_samples = padded_size - signal_padded.mask[:, 0].sum()
+    mask = ma.getmask(signal_padded)
+    if mask is not ma.nomask:
+        # the mask is False on the samples, then True on the padding
+        n_samples = int(np.searchsorted(mask[:, 0], True))
+    elif padded_size == 0 or not np.isnan(signal_padded[-1]).all():
+        # no padding
+        n_samples = padded_size
+    else:
+        is_observed = ~np.isnan(signal_padded).all(axis=1)
+        n_samples = padded_size - int(np.argmax(is_observed[::-1]))
+        if not is_observed.any():
+            n_samples = 0
     return (n_samples, n_dims)
+
+
+def get_signal_lengths(X: np.ndarray) -> np.ndarray:
+    """Return the true number of samples (without padding) of each signal of
+    a padded data set, in one vectorized pass.
+
+    The padding is made of the trailing samples that are masked in all
+    dimensions (masked array) or NaN in all dimensions (plain array). If the
+    last sample of every signal is observed (equal lengths), only this sample
+    is inspected.
+
+    Args:
+        X (np.ndarray): masked or NaN-padded data set, shape (N, T, d).
+
+    Returns:
+        np.ndarray: lengths, shape (N,).
+    """
+    err_msg = f"Wrong dimensions: {X.shape}. Expected: (N, T, d)."
+    assert X.ndim == 3, err_msg
+
+    n_signals, max_size, _ = X.shape
+    mask = ma.getmask(X)
+
+    def is_padding(index) -> np.ndarray:
+        # samples masked (NaN, without mask) in all dimensions
+        if mask is ma.nomask:
+            return np.isnan(ma.getdata(X)[index]).all(axis=-1)
+        return mask[index].all(axis=-1)
+
+    if max_size == 0 or not is_padding((slice(None), -1)).any():
+        # equal lengths: the last sample of each signal is observed
+        return np.full(n_signals, max_size, dtype=np.int64)
+    is_observed = ~is_padding(Ellipsis)
+    lengths = max_size - np.argmax(is_observed[:, ::-1], axis=1)
+    lengths[~is_observed.any(axis=1)] = 0
+    return lengths
+
+
+def iter_signals(
+    X: np.ndarray, lengths: Optional[np.ndarray] = None
+) -> Iterator[np.ndarray]:
+    """Iterate over the signals of a padded data set, without padding.
+
+    The signals are views of the data (no copy): `X[n, :lengths[n]]`,
+    without mask.
+
+    Args:
+        X (np.ndarray): masked or NaN-padded data set, shape (N, T, d).
+        lengths (np.ndarray, optional): number of samples of each signal,
+            shape (N,), e.g. `lengths_train` returned by `load_uea_ucr_data`.
+            Defaults to None (computed with `get_signal_lengths`).
+
+    Yields:
+        np.ndarray: signal of shape (T(n), d).
+    """
+    if lengths is None:
+        lengths = get_signal_lengths(X)
+    X = ma.getdata(X)
+    for signal, n_samples in zip(X, lengths):
+        yield signal[:n_samples]
+
+
+def get_mask_from_lengths(
+    lengths: np.ndarray, max_size: int, n_dims: int
+) -> np.ndarray:
+    """Return the mask of a padded data set from the signals' lengths.
+
+    Args:
+        lengths (np.ndarray): number of samples of each signal, shape (N,).
+        max_size (int): padded number of samples T.
+        n_dims (int): number of dimensions d.
+
+    Returns:
+        np.ndarray: boolean mask of shape (N, T, d), True on the padding.
+    """
+    mask = np.arange(max_size)[None, :] >= np.asarray(lengths)[:, None]
+    return np.repeat(mask[:, :, None], n_dims, axis=2)
+
+
+class RaggedArray:
+    """Data set of signals of different lengths, stored without padding.
+
+    The samples of all signals are stored contiguously in `values`, of shape
+    (sum_n T(n), d). The n-th signal is `values[offsets[n]:offsets[n + 1]]`
+    and is returned as a view (no copy) by `ragged_array[n]`.
+
+    Args:
+        values (np.ndarray): samples of all signals, shape (sum_n T(n), d).
+        offsets (np.ndarray): start of each signal in `values` and end of the
+            last one, shape (N + 1,).
+    """
+
+    def __init__(self, values: np.ndarray, offsets: np.ndarray) -> None:
+        assert values.ndim == 2, "values must have shape (n_samples, n_dims)."
+        assert offsets[0] == 0 and offsets[-1] == values.shape[0], (
+            "offsets must start at 0 and end at the number of samples "
+            f"(={values.shape[0]})."
+        )
+        self.values = values
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @classmethod
+    def from_padded(cls, X: np.ndarray, lengths: np.ndarray) -> "RaggedArray":
+        """Remove the padding of a data set.
+
+        Args:
+            X (np.ndarray): padded data set, shape (N, T, d).
+            lengths (np.ndarray): number of samples of each signal, shape (N,).
+
+        Returns:
+            RaggedArray: the data set without padding.
+        """
+        X = ma.getdata(X)
+        _, max_size, _ = X.shape
+        is_sample = np.arange(max_size)[None, :] < np.asarray(lengths)[:, None]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        return cls(X[is_sample], offsets)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of samples of each signal, shape (N,)."""
+        return np.diff(self.offsets)
+
+    @property
+    def n_dims(self) -> int:
+        return self.values.shape[1]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.offsets.nbytes
+
+    def __len__(self) -> int:
+        return self.offsets.shape[0] - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                # contiguous signals: the values are not copied
+                offsets = self.offsets[start : max(start, stop) + 1]
+                return RaggedArray(
+                    self.values[offsets[0] : offsets[-1]], offsets - offsets[0]
+                )
+            index = np.arange(start, stop, step)
+        if isinstance(index, (list, np.ndarray)):
+            index = np.arange(len(self))[index]
+            lengths = self.lengths[index]
+            offsets = np.concatenate([[0], np.cumsum(lengths)])
+            # position of each selected sample in `values`
+            sample_index = np.arange(offsets[-1]) + np.repeat(
+                self.offsets[index] - offsets[:-1], lengths
+            )
+            return RaggedArray(self.values[sample_index], offsets)
+        index = range(len(self))[index]
+        return self.values[self.offsets[index] : self.offsets[index + 1]]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        return (
+            f"RaggedArray(n_signals={len(self)}, n_dims={self.n_dims}, "
+            f"n_samples={self.values.shape[0]}, dtype={self.dtype})"
+        )
+
+    def to_padded(self, max_size: Optional[int] = None) -> MaskedArray:
+        """Pad the signals at the end with NaNs (masked).
+
+        Args:
+            max_size (int, optional): padded number of samples. Defaults to
+                the length of the longest signal.
+
+        Returns:
+            MaskedArray: padded data set, shape (N, max_size, d).
+        """
+        lengths = self.lengths
+        if max_size is None:
+            max_size = int(lengths.max(initial=0))
+        assert max_size >= lengths.max(
+            initial=0
+        ), f"max_size (={max_size}) must be larger than the longest signal."
+        X = np.full((len(self), max_size, self.n_dims), np.nan, self.dtype)
+        mask = get_mask_from_lengths(lengths, max_size, self.n_dims)
+        X[~mask[:, :, 0]] = self.values
+        return ma.masked_array(X, mask=mask)
+
+
+def iter_bucketed_batches(
+    X: Union[np.ndarray, RaggedArray],
+    batch_size: int,
+    lengths: Optional[np.ndarray] = None,
+    bucket_size: Optional[int] = None,
+    shuffle: bool = False,
+    random_state: Optional[Union[int, np.random.Generator]] = None,
+    layout: str = "padded",
+) -> Iterator[Tuple[Union[np.ndarray, MaskedArray], np.ndarray, np.ndarray]]:
+    """Iterate over a data set by batches of signals of similar lengths.
+
+    The signals are sorted by length and cut into buckets of `bucket_size`
+    signals, and each bucket is cut into batches. Each batch is padded to the
+    length of its longest signal, instead of the length of the longest signal
+    of the data set, which removes most of the padding when the lengths are
+    spread out.
+
+    With `shuffle`, signals of equal lengths are shuffled, the signals of
+    each bucket are shuffled before being cut into batches, and the batches
+    are yielded in random order. Larger buckets give more random batches, but
+    more padding.
+
+    Args:
+        X (np.ndarray or RaggedArray): data set, padded (masked or NaN-padded
+            array of shape (N, T, d)) or not (RaggedArray).
+        batch_size (int): number of signals per batch.
+        lengths (np.ndarray, optional): number of samples of each signal,
+            shape (N,), e.g. `lengths_train` returned by `load_uea_ucr_data`.
+            Defaults to None (computed with `get_signal_lengths`).
+        bucket_size (int, optional): number of signals per bucket. Defaults
+            to None (`batch_size`).
+        shuffle (bool): shuffle the batches. Defaults to False.
+        random_state (int or np.random.Generator, optional): seed of the
+            shuffling. Defaults to None.
+        layout (str): "padded" (NaN-padded np.ndarray) or "masked"
+            (MaskedArray) batches. Defaults to "padded".
+
+    Yields:
+        (np.ndarray or MaskedArray, np.ndarray, np.ndarray): X_batch of shape
+            (batch_size, T_batch, d), the lengths of its signals and their
+            indices in X (to select the labels), both of shape (batch_size,).
+    """
+    assert batch_size > 0, f"batch_size (={batch_size}) must be positive."
+    assert layout in ("padded", "masked"), f"Unknown layout: '{layout}'."
+    if bucket_size is None:
+        bucket_size = batch_size
+    assert bucket_size > 0, f"bucket_size (={bucket_size}) must be positive."
+    if lengths is None:
+        lengths = (
+            X.lengths if isinstance(X, RaggedArray) else get_signal_lengths(X)
+        )
+    lengths = np.asarray(lengths)
+
+    rng = np.random.default_rng(random_state)
+    if shuffle:
+        # stable sort of a random permutation: equal lengths are shuffled
+        permutation = rng.permutation(len(lengths))
+        order = permutation[np.argsort(lengths[permutation], kind="stable")]
+    else:
+        order = np.argsort(lengths, kind="stable")
+    batches = list()
+    for start in range(0, len(order), bucket_size):
+        bucket = order[start : start + bucket_size]
+        if shuffle:
+            bucket = rng.permutation(bucket)
+        batches.extend(
+            bucket[batch_start : batch_start + batch_size]
+            for batch_start in range(0, len(bucket), batch_size)
+        )
+    if shuffle:
+        batches = [batches[index] for index in rng.permutation(len(batches))]
+
+    for indices in batches:
+        batch_lengths = lengths[indices]
+        max_size = int(batch_lengths.max(initial=0))
+        if isinstance(X, RaggedArray):
+            X_batch = X[indices].to_padded(max_size)
+        else:
+            X_batch = np.array(ma.getdata(X)[indices, :max_size])
+            mask = get_mask_from_lengths(
+                batch_lengths, max_size, X_batch.shape[2]
+            )
+            X_batch[mask] = np.nan
+            X_batch = ma.masked_array(X_batch, mask=mask)
+        if layout == "padded":
+            X_batch = ma.getdata(X_batch)
+        yield X_batch, batch_lengths, indices
@@ -0,0 +1,669 @@
+import io
+import re
+from concurrent.futures import Executor
+from itertools import islice
+from multiprocessing.shared_memory import SharedMemory
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+from numpy.typing import DTypeLike
+
+from loadmydata.padding import get_signal_lengths
+
+# number of values above which a file is tokenized by chunks, when a process
+# pool is available
+PARALLEL_CHUNK_SIZE = 2**20
+
+# @attribute <name, possibly quoted> <type>
+ATTRIBUTE_REGEX = re.compile(
+    r"@attribute\s+('[^']*'|\"[^\"]*\"|\S+)\s+(.*)", re.IGNORECASE
+)
+
+
+def read_arff_header(f: TextIO) -> dict:
+    """Read the header of a .arff file from the UEA/UCR repository.
+
+    The file object is left at the beginning of the `@data` section.
+
+    Univariate data sets have one numeric attribute per time stamp.
+    Multivariate data sets have a single relational attribute, which contains
+    one numeric attribute per time stamp (each dimension is a line of the
+    relational value). In both cases, the last attribute is the class.
+
+    Args:
+        f (TextIO): text file object.
+
+    Returns:
+        dict: `n_samples` (number of time stamps), `is_multivariate` and
+            `classes` (declared class values, or None).
+    """
+    n_samples = 0
+    is_multivariate = False
+    is_in_relational = False
+    last_attribute = None
+    for line in f:
+        line = line.strip()
+        if line == "" or line.startswith("%"):
+            continue
+        keyword = line.split(maxsplit=1)[0].lower()
+        if keyword == "@data":
+            break
+        if keyword == "@end":
+            is_in_relational = False
+        elif keyword == "@attribute":
+            attribute_type = ATTRIBUTE_REGEX.match(line).group(2)
+            if attribute_type.lower().startswith("relational"):
+                is_multivariate = True
+                is_in_relational = True
+            elif is_in_relational:
+                n_samples += 1
+            else:
+                if last_attribute is not None and not is_multivariate:
+                    n_samples += 1
+                last_attribute = attribute_type
+    else:
+        raise ValueError("No @data section in the .arff file.")
+
+    classes = None
+    if last_attribute is not None and last_attribute.startswith("{"):
+        classes = [
+            value.strip().strip("'\"")
+            for value in last_attribute.strip("{}").split(",")
+        ]
+    return dict(
+        n_samples=n_samples, is_multivariate=is_multivariate, classes=classes
+    )
+
+
+def read_values(
+    rows: List[str], n_values: int, dtype: DTypeLike = float
+) -> np.ndarray:
+    """Tokenize rows of comma-separated numbers in bulk.
+
+    Shorter rows (and empty rows) are padded with NaNs. Missing values (`?`
+    or `NaN`) are NaNs. Spaces after the commas are ignored.
+
+    Args:
+        rows (list of str): rows of comma-separated numbers.
+        n_values (int): maximum number of values per row.
+        dtype (DTypeLike): floating point type of the output. Defaults to
+            float.
+
+    Returns:
+        np.ndarray: values, shape (n_rows, n_values).
+    """
+    # pandas' parser does not support float16: parse as float32, the values
+    # are cast when copied into the output array.
+    parse_dtype = np.float32 if np.dtype(dtype) == np.float16 else dtype
+    if len(rows) == 0:
+        return np.empty((0, n_values), dtype=parse_dtype)
+    return pd.read_csv(
+        # the final newline keeps a trailing empty row
+        io.StringIO("\n".join(rows) + "\n"),
+        header=None,
+        names=range(n_values),
+        na_values=["?"],
+        dtype=parse_dtype,
+        engine="c",
+        skip_blank_lines=False,
+        # e.g. `1, ?, 3` (accepted by scipy's ARFF reader)
+        skipinitialspace=True,
+    ).to_numpy()
+
+
+def fill_from_rows(X: np.ndarray, rows: List[str]) -> None:
+    """Tokenize rows of values into X.
+
+    The rows are dimension-major: there is either one row per series (all
+    dimensions one after the other) or one row per dimension of each series.
+
+    Args:
+        X (np.ndarray): output array, shape (n_series, n_samples, n_dims).
+        rows (list of str): rows of comma-separated numbers.
+    """
+    n_series, n_samples, n_dims = X.shape
+    if n_series == 0:
+        return
+    n_values = n_samples * n_dims // (len(rows) // n_series)
+    values = read_values(rows, n_values, dtype=X.dtype)
+    # dimension-major rows: (n_series, n_dims, n_samples)
+    X[:] = values.reshape(n_series, n_dims, n_samples).transpose(0, 2, 1)
+
+
+def fill_shared_from_rows(
+    shm_name: str,
+    shape: Tuple[int, int, int],
+    dtype: str,
+    start: int,
+    n_rows_per_series: int,
+    rows: List[str],
+) -> None:
+    """Tokenize rows of values into series `start`, `start + 1`, ... of an
+    array in shared memory (executed in a worker process, see
+    `rows_to_array`)."""
+    shm = SharedMemory(name=shm_name)
+    try:
+        X = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        stop = start + len(rows) // n_rows_per_series
+        fill_from_rows(X[start:stop], rows)
+        del X
+    finally:
+        shm.close()
+
+
+def rows_to_array(
+    rows: List[str],
+    shape: Tuple[int, int, int],
+    dtype: DTypeLike = float,
+    executor: Optional[Executor] = None,
+) -> np.ndarray:
+    """Tokenize rows of values into an array (see `fill_from_rows`).
+
+    If a process pool is given and there are more than
+    `PARALLEL_CHUNK_SIZE` values, contiguous chunks of series are tokenized
+    in the worker processes, which write directly into an array in shared
+    memory (only the text of the rows is sent to the workers).
+
+    Args:
+        rows (list of str): rows of comma-separated numbers.
+        shape (tuple): (n_series, n_samples, n_dims).
+        dtype (DTypeLike): floating point type of the output. Defaults to
+            float.
+        executor (Executor, optional): process pool. Defaults to None.
+
+    Returns:
+        np.ndarray: values, shape (n_series, n_samples, n_dims).
+    """
+    X = np.empty(shape, dtype=dtype)
+    if executor is None or X.size <= PARALLEL_CHUNK_SIZE:
+        fill_from_rows(X, rows)
+        return X
+
+    n_series, n_samples, n_dims = shape
+    n_rows_per_series = len(rows) // n_series
+    chunk_n_rows = (
+        max(1, PARALLEL_CHUNK_SIZE // (n_samples * n_dims)) * n_rows_per_series
+    )
+    shm = SharedMemory(create=True, size=X.nbytes)
+    try:
+        X_shared = np.ndarray(shape, dtype=X.dtype, buffer=shm.buf)
+        futures = [
+            executor.submit(
+                fill_shared_from_rows,
+                shm.name,
+                shape,
+                X.dtype.str,
+                start // n_rows_per_series,
+                n_rows_per_series,
+                rows[start : start + chunk_n_rows],
+            )
+            for start in range(0, len(rows), chunk_n_rows)
+        ]
+        for future in futures:
+            future.result()
+        X[:] = X_shared
+        del X_shared
+    finally:
+        shm.close()
+        shm.unlink()
+    return X
+
+
+def iter_arff_rows(
+    f: TextIO, is_multivariate: bool
+) -> Iterator[Tuple[str, str, int]]:
+    """Iterate over the series of the `@data` section of a .arff file from
+    the UEA/UCR repository, without tokenizing the values.
+
+    In multivariate data sets, the dimensions are separated by "\\n" (two
+    characters) inside a quoted string. Once the quotes are removed and the
+    separators replaced by commas, all rows are flat lists of values
+    (dimension-major) followed by the label.
+
+    Args:
+        f (TextIO): text file object, at the beginning of the `@data`
+            section.
+        is_multivariate (bool): multivariate data set.
+
+    Yields:
+        (str, str, int): comma-separated values, label and number of
+            dimensions of a series.
+    """
+    for line in f:
+        line = line.strip()
+        if line == "" or line.startswith("%"):
+            continue
+        n_dims = 1
+        if is_multivariate:
+            n_dims = line.count("\\n") + 1
+            line = line.replace("\\n", ",").replace("'", "").replace('"', "")
+        values, _, label = line.rpartition(",")
+        yield values, label.strip().strip("'\""), n_dims
+
+
+def read_arff_rows(f: TextIO) -> (List[str], List[str], int, int):
+    """Read the rows of the `@data` section of a .arff file from the UEA/UCR
+    repository, without tokenizing the values (see `iter_arff_rows`).
+
+    Args:
+        f (TextIO): text file object.
+
+    Returns:
+        (list, list, int, int): one row of comma-separated values per
+            series, the labels, the number of samples and the number of
+            dimensions.
+    """
+    header = read_arff_header(f)
+    values_list, y, n_dims = join_arff_rows(
+        iter_arff_rows(f, header["is_multivariate"])
+    )
+    return values_list, y, header["n_samples"], n_dims
+
+
+def join_arff_rows(
+    rows: Iterable[Tuple[str, str, int]],
+) -> (List[str], List[str], int):
+    """Gather the rows of a .arff file (see `iter_arff_rows`).
+
+    Args:
+        rows (iterable): (values, label, n_dims) for each series.
+
+    Returns:
+        (list, list, int): the values of each series, the labels and the
+            number of dimensions (of the first series).
+    """
+    values_list = list()
+    y = list()
+    n_dims = 1
+    for values, label, n_dims_series in rows:
+        if len(y) == 0:
+            n_dims = n_dims_series
+        values_list.append(values)
+        y.append(label)
+    return values_list, y, n_dims
+
+
+def parse_arff(
+    f: TextIO, dtype: DTypeLike = float, executor: Optional[Executor] = None
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """Parse a .arff file from the UEA/UCR repository.
+
+    The `@data` section is tokenized in bulk (with pandas' C parser) and the
+    values are written into a single (n_series, n_samples, n_dims) array.
+    Missing values (`?`) are NaNs.
+
+    Args:
+        f (TextIO): text file object.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+        executor (Executor, optional): process pool used to tokenize large
+            files by chunks (see `rows_to_array`). Defaults to None.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): X of shape (n_series,
+            n_samples, n_dims), the lengths of the signals (without the
+            trailing NaN padding) of shape (n_series,) and y of shape
+            (n_series,).
+    """
+    values_list, y, n_samples, n_dims = read_arff_rows(f)
+    X = rows_to_array(
+        values_list, (len(y), n_samples, n_dims), dtype, executor=executor
+    )
+    return X, get_signal_lengths(X), np.array(y, dtype=str)
+
+
+def read_ts_header(f: TextIO) -> dict:
+    """Read the header of a .ts file (sktime format).
+
+    The file object is left at the beginning of the `@data` section.
+
+    Args:
+        f (TextIO): text file object.
+
+    Returns:
+        dict: `is_equal_length`, `n_samples` (series length, or None if
+            unknown), `has_label` and `classes` (declared class values, or
+            None).
+    """
+    header = dict(
+        is_equal_length=False, n_samples=None, has_label=False, classes=None
+    )
+    for line in f:
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        keyword, _, value = line.partition(" ")
+        keyword = keyword.lower()
+        value = value.strip()
+        if keyword == "@data":
+            break
+        if keyword == "@timestamps" and value.lower() == "true":
+            raise NotImplementedError(".ts files with time stamps.")
+        if keyword == "@equallength":
+            header["is_equal_length"] = value.lower() == "true"
+        elif keyword == "@serieslength":
+            header["n_samples"] = int(value)
+        elif keyword == "@classlabel":
+            is_true, _, classes = value.partition(" ")
+            header["has_label"] = is_true.lower() == "true"
+            if header["has_label"] and classes.strip() != "":
+                header["classes"] = classes.split()
+        elif keyword == "@targetlabel":
+            header["has_label"] = value.lower() == "true"
+    else:
+        raise ValueError("No @data section in the .ts file.")
+    return header
+
+
+def iter_ts_rows(
+    f: TextIO, has_label: bool
+) -> Iterator[Tuple[List[str], str]]:
+    """Iterate over the series of the `@data` section of a .ts file (sktime
+    format), without tokenizing the values.
+
+    Each line contains one series: dimensions are separated by colons, values
+    by commas, and the label comes last.
+
+    Args:
+        f (TextIO): text file object, at the beginning of the `@data`
+            section.
+        has_label (bool): the series are labelled.
+
+    Yields:
+        (list, str): comma-separated values of each dimension and label
+            (empty string if there is none) of a series.
+    """
+    for line in f:
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        label = ""
+        if has_label:
+            line, _, label = line.rpartition(":")
+        yield line.split(":"), label.strip()
+
+
+def join_ts_rows(
+    rows: Iterable[Tuple[List[str], str]], n_samples: Optional[int] = None
+) -> (List[str], List[str], int, int):
+    """Gather the rows of a .ts file (see `iter_ts_rows`).
+
+    Args:
+        rows (iterable): (dimensions, label) for each series.
+        n_samples (int, optional): series length, if known. Defaults to None
+            (length of the longest series).
+
+    Returns:
+        (list, list, int, int): one row of comma-separated values per
+            dimension of each series, the labels, the number of samples and
+            the number of dimensions.
+    """
+    dims_list = list()
+    y = list()
+    n_dims = None
+    for dims, label in rows:
+        if n_dims is None:
+            n_dims = len(dims)
+        elif len(dims) != n_dims:
+            raise ValueError(
+                f"Series {len(y)} has {len(dims)} dimensions (expected "
+                f"{n_dims})."
+            )
+        dims_list.extend(dims)
+        y.append(label)
+    if n_samples is None:
+        n_samples = max((dim.count(",") + 1 for dim in dims_list), default=0)
+    return dims_list, y, n_samples, n_dims or 1
+
+
+def read_ts_rows(f: TextIO) -> (List[str], List[str], int, int):
+    """Read the rows of the `@data` section of a .ts file (sktime format),
+    without tokenizing the values (see `iter_ts_rows`).
+
+    Args:
+        f (TextIO): text file object.
+
+    Returns:
+        (list, list, int, int): one row of comma-separated values per
+            dimension of each series, the labels (empty strings if there are
+            none), the number of samples (length of the longest series) and
+            the number of dimensions.
+    """
+    header = read_ts_header(f)
+    return join_ts_rows(
+        iter_ts_rows(f, header["has_label"]),
+        n_samples=header["n_samples"] if header["is_equal_length"] else None,
+    )
+
+
+def parse_ts(
+    f: TextIO, dtype: DTypeLike = float, executor: Optional[Executor] = None
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """Parse a .ts file (sktime format) from the UEA/UCR repository.
+
+    Missing values (`?` or `NaN`) are NaNs. Series of unequal lengths are
+    padded at the end with NaNs.
+
+    The file is read line by line and the values are tokenized in bulk (with
+    pandas' C parser), one row per dimension of each series.
+
+    Args:
+        f (TextIO): text file object.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+        executor (Executor, optional): process pool used to tokenize large
+            files by chunks (see `rows_to_array`). Defaults to None.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): X of shape (n_series,
+            n_samples, n_dims), the lengths of the signals (without the
+            trailing NaN padding) of shape (n_series,) and y of shape
+            (n_series,).
+    """
+    dims_list, y, n_samples, n_dims = read_ts_rows(f)
+    X = rows_to_array(
+        dims_list, (len(y), n_samples, n_dims), dtype, executor=executor
+    )
+    return X, get_signal_lengths(X), np.array(y, dtype=str)
+
+
+def iter_arff(
+    f: TextIO, batch_size: int = 256, dtype: DTypeLike = float
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Parse a .arff file from the UEA/UCR repository by batches of series.
+
+    Only one batch is held in memory at a time.
+
+    Args:
+        f (TextIO): text file object.
+        batch_size (int): number of series per batch. Defaults to 256.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+
+    Yields:
+        (np.ndarray, np.ndarray, np.ndarray): X of shape (batch_size,
+            n_samples, n_dims), the lengths of the signals of shape
+            (batch_size,) and y of shape (batch_size,). The last batch can be
+            smaller.
+    """
+    assert batch_size > 0, f"batch_size (={batch_size}) must be positive."
+    header = read_arff_header(f)
+    rows = iter_arff_rows(f, header["is_multivariate"])
+    while True:
+        values_list, y, n_dims = join_arff_rows(islice(rows, batch_size))
+        if len(y) == 0:
+            return
+        X = rows_to_array(
+            values_list, (len(y), header["n_samples"], n_dims), dtype
+        )
+        yield X, get_signal_lengths(X), np.array(y, dtype=str)
+
+
+def iter_ts(
+    f: TextIO, batch_size: int = 256, dtype: DTypeLike = float
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Parse a .ts file (sktime format) by batches of series.
+
+    Only one batch is held in memory at a time. If the series have unequal
+    lengths, each batch is padded to the length of its longest series.
+
+    Args:
+        f (TextIO): text file object.
+        batch_size (int): number of series per batch. Defaults to 256.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+
+    Yields:
+        (np.ndarray, np.ndarray, np.ndarray): X of shape (batch_size,
+            n_samples, n_dims), the lengths of the signals of shape
+            (batch_size,) and y of shape (batch_size,). The last batch can be
+            smaller.
+    """
+    assert batch_size > 0, f"batch_size (={batch_size}) must be positive."
+    header = read_ts_header(f)
+    rows = iter_ts_rows(f, header["has_label"])
+    n_samples = header["n_samples"] if header["is_equal_length"] else None
+    while True:
+        dims_list, y, n_samples_batch, n_dims = join_ts_rows(
+            islice(rows, batch_size), n_samples=n_samples
+        )
+        if len(y) == 0:
+            return
+        X = rows_to_array(dims_list, (len(y), n_samples_batch, n_dims), dtype)
+        yield X, get_signal_lengths(X), np.array(y, dtype=str)
+
+
+def index_rows(
+    f: BinaryIO,
+    read_header: Callable[[Iterable[str]], dict],
+    comment: bytes,
+    get_row_size: Optional[Callable[[bytes], int]] = None,
+) -> (dict, np.ndarray, int):
+    """Read the header of a .arff or .ts file and the byte offsets of the
+    series of its `@data` section.
+
+    Args:
+        f (BinaryIO): binary file object.
+        read_header (Callable): header reader, e.g. `read_arff_header`.
+        comment (bytes): prefix of comment lines.
+        get_row_size (Callable, optional): function that returns the number
+            of samples of a row. Defaults to None.
+
+    Returns:
+        (dict, np.ndarray, int): the header, the offsets of the series of
+            shape (n_series,) and the largest row size (0 if `get_row_size`
+            is None).
+    """
+    lines = iter(f)
+    position = 0
+
+    def iter_header_lines() -> Iterator[str]:
+        nonlocal position
+        for line in lines:
+            position += len(line)
+            yield line.decode()
+
+    header = read_header(iter_header_lines())
+    offsets = list()
+    max_row_size = 0
+    for line in lines:
+        stripped_line = line.strip()
+        if stripped_line != b"" and not stripped_line.startswith(comment):
+            offsets.append(position)
+            if get_row_size is not None:
+                max_row_size = max(max_row_size, get_row_size(stripped_line))
+        position += len(line)
+    return header, np.array(offsets, dtype=np.int64), max_row_size
+
+
+def index_arff_rows(f: BinaryIO) -> (dict, np.ndarray):
+    """Return the header of a .arff file (see `read_arff_header`) and the
+    byte offsets of its series, shape (n_series,)."""
+    header, offsets, _ = index_rows(f, read_arff_header, b"%")
+    return header, offsets
+
+
+def get_ts_row_size(line: bytes) -> int:
+    """Return the length of the longest dimension of a .ts series."""
+    return max(dim.count(b",") for dim in line.split(b":")) + 1
+
+
+def index_ts_rows(f: BinaryIO) -> (dict, np.ndarray):
+    """Return the header of a .ts file (see `read_ts_header`) and the byte
+    offsets of its series, shape (n_series,).
+
+    If the series have unequal lengths, `n_samples` is set to the length of
+    the longest series.
+    """
+    header, offsets, max_row_size = index_rows(
+        f, read_ts_header, b"#", get_row_size=get_ts_row_size
+    )
+    if not header["is_equal_length"] or header["n_samples"] is None:
+        header["n_samples"] = max_row_size
+    return header, offsets
+
+
+def read_lines_at(f: BinaryIO, offsets: np.ndarray) -> Iterator[str]:
+    """Read the lines that start at the given byte offsets."""
+    for offset in offsets:
+        f.seek(int(offset))
+        yield f.readline().decode()
+
+
+def parse_arff_rows(
+    f: BinaryIO, header: dict, offsets: np.ndarray, dtype: DTypeLike = float
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """Parse the series of a .arff file that start at the given byte offsets
+    (see `index_arff_rows`).
+
+    Args:
+        f (BinaryIO): binary file object.
+        header (dict): header of the file.
+        offsets (np.ndarray): offsets of the series to parse, preferably in
+            increasing order.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): X of shape (n_offsets,
+            n_samples, n_dims), the lengths of the signals of shape
+            (n_offsets,) and y of shape (n_offsets,).
+    """
+    values_list, y, n_dims = join_arff_rows(
+        iter_arff_rows(read_lines_at(f, offsets), header["is_multivariate"])
+    )
+    X = rows_to_array(
+        values_list, (len(y), header["n_samples"], n_dims), dtype
+    )
+    return X, get_signal_lengths(X), np.array(y, dtype=str)
+
+
+def parse_ts_rows(
+    f: BinaryIO, header: dict, offsets: np.ndarray, dtype: DTypeLike = float
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """Parse the series of a .ts file that start at the given byte offsets
+    (see `index_ts_rows`).
+
+    Args:
+        f (BinaryIO): binary file object.
+        header (dict): header of the file.
+        offsets (np.ndarray): offsets of the series to parse, preferably in
+            increasing order.
+        dtype (DTypeLike): floating point type of X. Defaults to float.
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): X of shape (n_offsets,
+            n_samples, n_dims), the lengths of the signals of shape
+            (n_offsets,) and y of shape (n_offsets,).
+    """
+    dims_list, y, n_samples, n_dims = join_ts_rows(
+        iter_ts_rows(read_lines_at(f, offsets), header["has_label"]),
+        n_samples=header["n_samples"],
+    )
+    X = rows_to_array(dims_list, (len(y), n_samples, n_dims), dtype)
+    return X, get_signal_lengths(X), np.array(y, dtype=str)
@@ -1,42 +1,22 @@
-import os
-import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
 from urllib.request import urlretrieve
-from zipfile import ZipFile
 
-import requests
 from tqdm import tqdm
 from yarl import URL
 
+# get_cache_home and clear_data_home are still importable from here
+from loadmydata.cache import (  # noqa: F401
+    clear_data_home,
+    enforce_cache_budget,
+    get_cache_home,
+    get_local_data_path,
+    mark_access,
+)
 from loadmydata.config import CONFIG
-
-
-def get_cache_home() -> Path:
-    """Return the path of the cached data directory.
-
-    The data dir is read from the `CONFIG` variable and is created if it
-    does not exists.
-    """
-    cache_home = CONFIG["cache_home"]
-    if not cache_home.exists():
-        cache_home.mkdir()
-    return cache_home
-
-
-def clear_data_home() -> None:
-    """Delete the content of the data cache."""
-    cache_home = CONFIG["cache_home"]
-    if cache_home.exists():
-        shutil.rmtree(cache_home)
-
-
-def get_local_data_path(name: str):
-    """Return the path to the local data folder.
-
-    Args:
-        name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
-    """
-    return get_cache_home() / name
+from loadmydata.download import download_and_extract_archive, get_download_urls
 
 
 def get_uea_ucr_download_link() -> URL:
@@ -47,52 +27,86 @@ def get_uea_ucr_download_link() -> URL:
     return CONFIG["uea_ucr_download_link"]
 
 
-def download_from_remote_uea_ucr(name: str) -> None:
+def download_from_remote_uea_ucr(name: str, verbose: bool = True) -> None:
     """Download and uncompress data from UEA/UCR repository.
 
     Args:
         name (str): data set's name, e.g. `ArrowHead` (case-sensitive).
+        verbose (bool): display a progress bar. Defaults to True.
     """
     local_cache_data = get_local_data_path(name)
 
     if not local_cache_data.exists():
-        local_cache_data.mkdir(exist_ok=True, parents=True)
-
         # get archive's url
         archive_name = name + ".zip"
-        local_archive_path = local_cache_data / archive_name
         remote_archive_path = get_uea_ucr_download_link() / archive_name
-        response = requests.get(remote_archive_path, stream=True)
-        # handle the download progress bar
-        total_size_in_bytes = int(response.headers.get("content-length", 0))
-        block_size = 1024  # 1 Kibibyte
-        progress_bar = tqdm(
-            total=total_size_in_bytes, unit="iB", unit_scale=True
+        download_and_extract_archive(
+            get_download_urls(remote_archive_path, "uea_ucr", archive_name),
+            archive_name,
+            local_cache_data,
+            verbose=verbose,
         )
-        # actual download
-        with open(local_archive_path, "wb") as handle:
-            for data in response.iter_content(block_size):
-                progress_bar.update(len(data))
-                handle.write(data)
-        progress_bar.close()
-        if total_size_in_bytes != 0 and progress_bar.n != total_size_in_bytes:
-            print(f"ERROR: the download of {archive_name} went wrong.")
-        # uncompress the data in the data folder
-        with ZipFile(local_archive_path, "r") as zf:
-            zf.extractall(local_cache_data)
-        # remove zip file
-        os.remove(local_archive_path)
-        # Check if the extracted directory contains a single sub-directory and
-        # no other file.
-        directory_list = [x for x in local_cache_data.iterdir() if x.is_dir()]
-        non_directory_list = [
-            x for x in local_cache_data.iterdir() if not x.is_dir()
-        ]
-        if len(directory_list) == 1 and len(non_directory_list) == 0:
-            sub_dir = directory_list[0]
-            for element in sub_dir.iterdir():
-                shutil.move(str(element), str(sub_dir.parent))
-            os.rmdir(str(sub_dir))
+        enforce_cache_budget(keep=(name,))
+    mark_access(name)
+
+
+def prefetch(
+    download_functions: Dict[str, Callable[[], None]], max_workers: int = 8
+) -> Dict[str, Optional[Exception]]:
+    """Download several data sets concurrently.
+
+    Args:
+        download_functions (dict): {data set's name: function that downloads
+            the data set}.
+        max_workers (int): maximum number of simultaneous downloads.
+            Defaults to 8.
+
+    Returns:
+        dict: {data set's name: None if the data set is in cache, otherwise
+            the exception raised during the download}.
+    """
+    report = dict()
+    with ThreadPoolExecutor(max_workers) as executor, tqdm(
+        total=len(download_functions), unit="dataset"
+    ) as progress_bar:
+        future_to_name = {
+            executor.submit(func): name
+            for (name, func) in download_functions.items()
+        }
+        for future in as_completed(future_to_name):
+            report[future_to_name[future]] = future.exception()
+            progress_bar.update(1)
+            progress_bar.set_postfix(
+                failed=sum(err is not None for err in report.values())
+            )
+    return {name: report[name] for name in download_functions}
+
+
+def prefetch_uea_ucr(
+    names: Iterable[str], max_workers: int = 8
+) -> Dict[str, Optional[Exception]]:
+    """Download and uncompress several data sets from the UEA/UCR repository.
+
+    Data sets are downloaded concurrently and cached exactly as with
+    `download_from_remote_uea_ucr`.
+
+    Args:
+        names (iterable of str): data sets' names, e.g. `["ArrowHead",
+            "ACSF1"]` (case-sensitive).
+        max_workers (int): maximum number of simultaneous downloads.
+            Defaults to 8.
+
+    Returns:
+        dict: {data set's name: None if the data set is in cache, otherwise
+            the exception raised during the download}.
+    """
+    return prefetch(
+        {
+            name: partial(download_from_remote_uea_ucr, name, verbose=False)
+            for name in names
+        },
+        max_workers=max_workers,
+    )
 
 
 def is_directory_empty(dir_path: Path) -> bool:
@@ -0,0 +1,50 @@
+import io
+import zipfile
+
+import pytest
+
+from loadmydata.download import StreamReader, extract_zip_stream
+
+
+def make_zip(n_members: int = 3) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for index in range(n_members):
+            zf.writestr(f"f{index}.txt", f"member {index}\n" * 100)
+    return buffer.getvalue()
+
+
+def extract(data: bytes, extract_dir) -> None:
+    extract_zip_stream(StreamReader(io.BytesIO(data)), extract_dir)
+
+
+def test_complete_archive(tmp_path):
+    extract(make_zip(), tmp_path)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "f0.txt",
+        "f1.txt",
+        "f2.txt",
+    ]
+    assert (tmp_path / "f2.txt").read_text() == "member 2\n" * 100
+
+
+def test_empty_archive(tmp_path):
+    extract(make_zip(n_members=0), tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("n_extra_bytes", [0, 2, 10])
+def test_truncated_archive(tmp_path, n_extra_bytes):
+    data = make_zip()
+    # cut the archive in (or right before) the local header of the third
+    # member
+    cut = data.index(b"PK\x03\x04", data.index(b"f1.txt") + 1)
+    with pytest.raises(EOFError):
+        extract(data[: cut + n_extra_bytes], tmp_path)
+
+
+def test_corrupted_archive(tmp_path):
+    data = make_zip()
+    cut = data.index(b"PK\x03\x04", data.index(b"f1.txt") + 1)
+    with pytest.raises(OSError):
+        extract(data[:cut] + b"<html>" + data[cut:], tmp_path)